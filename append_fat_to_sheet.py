@@ -1,76 +1,61 @@
 from datetime import datetime
 import streamlit as st
-
-def find_nearest_pole(fat, poles):
-    if not poles:
-        return ""
-    fat_lat, fat_lon = float(fat['lat']), float(fat['lon'])
-
-    def distance(pole):
-        pole_lat, pole_lon = float(pole['lat']), float(pole['lon'])
-        return (fat_lat - pole_lat) ** 2 + (fat_lon - pole_lon) ** 2
-
-    nearest = min(poles, key=distance)
-    return nearest['name']
-
-def append_fat_to_sheet(sheet, fat_points, poles, district, subdistrict, vendor):
-    headers = sheet.row_values(1)
-    header_map = {name.strip().lower(): i for i, name in enumerate(headers)}
-
-    values = sheet.get_all_values()
-    for i in range(len(values)-1, 0, -1):
-        if any(values[i]):
-            prev_row = values[i]
-            break
-    else:
-        prev_row = [""] * len(headers)
+from nearest_pole import nearest_pole_names, FAT_PARENT_TYPES
+from row_schema import RowSchema, PREV, data, param, values
+from sheet_template import SheetTemplate
+from sheet_writer import append_rows_chunked
+
+# Kolom H (nama FAT) dipakai untuk mencari baris terakhir
+PROBE_COL = 8
+# Kolom kunci dedup (nama, lat, lon), index 0-based
+KEY_COLUMNS = (7, 9, 10)
+
+# Susunan kolom sheet FAT (urutan = urutan penulisan, yang terakhir menang)
+FAT_SCHEMA = RowSchema([
+    (range(0, 5), PREV),            # Kolom A - E
+    (5, param("district")),         # Kolom F - J
+    (6, param("subdistrict")),
+    (7, data("name")),
+    (8, data("name")),
+    (9, data("lat")),
+    (10, data("lon")),
+    (range(11, 24), PREV),          # Kolom K - X
+    (24, param("vendor")),          # Kolom Y
+    (26, param("date")),            # Kolom AA (installation_date)
+    ("parentid 1", data("parent")),  # Kolom AG
+    ("parent_type 1", PREV),
+    ("fat type", PREV),
+    ("vendor name", param("vendor")),
+])
+
+def build_fat_rows(template, fat_points, poles, district, subdistrict, vendor):
+    if not len(fat_points):
+        return []
+
+    header_map = template.header_map
+    prev_row = template.prev_row
 
     today = datetime.today()
     formatted_date = today.strftime("%d/%m/%Y") if prev_row[header_map.get('installation_date', 0)].count("/") == 2 else today.strftime("%Y-%m-%d")
 
-    all_rows = []
-    for fat in fat_points:
-        row = [""] * len(headers)
-
-        # Kolom A - E
-        for col_idx in range(5):
-            row[col_idx] = prev_row[col_idx] if col_idx < len(prev_row) else ""
-
-        # Kolom F - J
-        row[5] = district.upper()
-        row[6] = subdistrict.upper()
-        row[7] = fat['name']
-        row[8] = fat['name']
-        row[9] = fat['lat']
-        row[10] = fat['lon']
-
-        # Kolom K - X
-        for idx in range(11, 24):
-            row[idx] = prev_row[idx] if idx < len(prev_row) else ""
-
-        # Kolom Y (vendor)
-        row[24] = vendor.upper()
-
-        # Kolom AA (installation_date)
-        row[26] = formatted_date
-
-        # Parent ID 1 (AG)
-        idx_ag = header_map.get('parentid 1')
-        if idx_ag is not None:
-            row[idx_ag] = find_nearest_pole(fat, [p for p in poles if p['folder'] == '7m3inch'])
-
-        # Parent Type 1 & FAT Type
-        for col in ['parent_type 1', 'fat type']:
-            idx = header_map.get(col.lower())
-            if idx is not None:
-                row[idx] = prev_row[idx]
-
-        # Vendor Name
-        idx_al = header_map.get('vendor name')
-        if idx_al is not None:
-            row[idx_al] = vendor.upper()
-
-        all_rows.append(row)
-
-    sheet.append_rows(all_rows)
+    builder = FAT_SCHEMA.compile(template, district=district.upper(), subdistrict=subdistrict.upper(),
+                                 vendor=vendor.upper(), date=formatted_date)
+
+    columns = {
+        'name': values(fat_points, 'name'),
+        'lat': values(fat_points, 'lat'),
+        'lon': values(fat_points, 'lon'),
+    }
+    # Parent ID 1 untuk semua FAT dicari sekaligus
+    if 'parentid 1' in header_map:
+        columns['parent'] = nearest_pole_names(fat_points, poles, FAT_PARENT_TYPES)
+    return builder.rows(columns)
+
+def append_fat_to_sheet(sheet, fat_points, poles, district, subdistrict, vendor, sink=None):
+    template = SheetTemplate(sheet, probe_col=PROBE_COL)
+    all_rows = build_fat_rows(template, fat_points, poles, district, subdistrict, vendor)
+    if sink is not None:
+        sink.write(sheet.title, template.headers, all_rows)
+    else:
+        append_rows_chunked(sheet, all_rows, probe_col=PROBE_COL)
     st.success(f"✅ {len(fat_points)} FAT")
@@ -1,16 +1,9 @@
 from datetime import datetime
-from math import dist
 import streamlit as st
-
-def find_nearest_pole(fdt_point, poles):
-    min_dist = float('inf')
-    nearest_name = ""
-    for pole in poles:
-        d = dist([fdt_point['lat'], fdt_point['lon']], [pole['lat'], pole['lon']])
-        if d < min_dist:
-            min_dist = d
-            nearest_name = pole['name']
-    return nearest_name
+from nearest_pole import nearest_pole_names, FDT_PARENT_TYPES
+from row_schema import RowSchema, TEMPLATE, data, param, values
+from sheet_template import SheetTemplate
+from sheet_writer import append_rows_chunked
 
 def templatecode_to_kolom_m(templatecode):
     mapping = {
@@ -36,57 +29,69 @@ def templatecode_to_kolom_ap(templatecode):
     }
     return mapping.get(templatecode.strip().upper(), "")
 
-def append_fdt_to_sheet(sheet, fdt_data, poles, district, subdistrict, vendor, kmz_name):
-    existing_rows = sheet.get_all_values()
-    headers = sheet.row_values(1)
-    header_map = {name.strip().lower(): i for i, name in enumerate(headers)}
-    template_row = existing_rows[-2] if len(existing_rows) > 2 else []
-    rows = []
-
-    idx_parentid = header_map.get('parentid 1')
-    if idx_parentid is None:
-        st.error("Kolom 'Parentid 1' tidak ditemukan di header spreadsheet.")
-        return 0
+# Kolom I (nama FDT) dipakai untuk mencari baris terakhir
+PROBE_COL = 9
+# Kolom kunci dedup (nama, lat, lon), index 0-based
+KEY_COLUMNS = (8, 10, 11)
 
-    for fdt in fdt_data:
-        name = fdt['name']
-        lat = fdt['lat']
-        lon = fdt['lon']
-        desc = fdt.get('description', '')
+# Susunan kolom sheet FDT (urutan = urutan penulisan, yang terakhir menang)
+FDT_SCHEMA = RowSchema([
+    (0, data("description")),
+    (range(1, 5), TEMPLATE),
+    (5, param("district")),
+    (6, param("subdistrict")),
+    (7, param("kmz_name")),
+    (8, data("name")),
+    (9, data("name")),
+    (10, data("lat")),
+    (11, data("lon")),
+    (12, param("kolom_m")),
+    (range(13, 16), TEMPLATE),
+    (17, param("kolom_r")),
+    (18, TEMPLATE),
+    (range(24, 28), TEMPLATE),
+    (29, TEMPLATE),
+    (30, TEMPLATE),
+    (40, TEMPLATE),
+    (41, param("kolom_ap")),
+    (33, param("date")),
+    (31, param("vendor")),
+    (44, param("vendor")),
+    ("parentid 1", data("parent")),
+])
 
-        kolom_m = templatecode_to_kolom_m(template_row[0])
-        kolom_r = templatecode_to_kolom_r(template_row[0])
-        kolom_ap = templatecode_to_kolom_ap(template_row[0])
+def build_fdt_rows(template, fdt_data, poles, district, subdistrict, vendor, kmz_name):
+    if 'parentid 1' not in template.header_map:
+        raise ValueError("Kolom 'Parentid 1' tidak ditemukan di header spreadsheet.")
+    if not len(fdt_data):
+        return []
 
-        row = [""] * len(existing_rows[0])
-        row[0] = desc
-        row[1:5] = template_row[1:5]
-        row[5] = district
-        row[6] = subdistrict
-        row[7] = kmz_name
-        row[8] = name
-        row[9] = name
-        row[10] = lat
-        row[11] = lon
-        row[12] = kolom_m
-        row[13:16] = template_row[13:16]
-        row[17] = kolom_r
-        row[18] = template_row[18]
-        row[24:28] = template_row[24:28]
-        row[29] = template_row[29]
-        row[30] = template_row[30]
-        row[40] = template_row[40]
-        row[41] = kolom_ap
-        row[33] = datetime.today().strftime("%d/%m/%Y")
-        row[31] = vendor
-        row[44] = vendor
+    # Jenis FDT dari baris template, sama untuk seluruh batch
+    templatecode = template.template_row[0]
+    builder = FDT_SCHEMA.compile(template, district=district, subdistrict=subdistrict, kmz_name=kmz_name,
+                                 vendor=vendor, date=datetime.today().strftime("%d/%m/%Y"),
+                                 kolom_m=templatecode_to_kolom_m(templatecode),
+                                 kolom_r=templatecode_to_kolom_r(templatecode),
+                                 kolom_ap=templatecode_to_kolom_ap(templatecode))
 
-        if idx_parentid is not None:
-            row[idx_parentid] = find_nearest_pole(fdt, [
-                p for p in poles if p['folder'] in ['7m4inch', '7m3inch', 'ext7m3inch', 'ext7m4inch', 'ext9m4inch']
-            ])
+    return builder.rows({
+        'description': values(fdt_data, 'description', ''),
+        'name': values(fdt_data, 'name'),
+        'lat': values(fdt_data, 'lat'),
+        'lon': values(fdt_data, 'lon'),
+        'parent': nearest_pole_names(fdt_data, poles, FDT_PARENT_TYPES),
+    })
 
-        rows.append(row)
+def append_fdt_to_sheet(sheet, fdt_data, poles, district, subdistrict, vendor, kmz_name, sink=None):
+    template = SheetTemplate(sheet, probe_col=PROBE_COL)
+    try:
+        rows = build_fdt_rows(template, fdt_data, poles, district, subdistrict, vendor, kmz_name)
+    except ValueError as e:
+        st.error(str(e))
+        return 0
 
-    sheet.append_rows(rows, value_input_option="USER_ENTERED")
+    if sink is not None:
+        sink.write(sheet.title, template.headers, rows)
+    else:
+        append_rows_chunked(sheet, rows, value_input_option="USER_ENTERED", probe_col=PROBE_COL)
     return len(rows)
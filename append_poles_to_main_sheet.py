@@ -1,72 +1,81 @@
 from datetime import datetime
+import streamlit as st
+from row_schema import RowSchema, PREV, data, param, values
+from sheet_template import SheetTemplate
+from sheet_writer import append_rows_chunked
 
-_cached_headers = None
-_cached_prev_row = None
+# Kolom G (nama tiang) selalu terisi, dipakai untuk mencari baris terakhir
+PROBE_COL = 7
+# Kolom kunci dedup (nama, lat, lon), index 0-based
+KEY_COLUMNS = (6, 8, 9)
 
-def append_poles_to_main_sheet(sheet, poles, district, subdistrict, vendor):
-    global _cached_headers, _cached_prev_row
+# Susunan kolom sheet Pole (urutan = urutan penulisan, yang terakhir menang)
+POLE_SCHEMA = RowSchema([
+    (range(0, 4), PREV),
+    (4, param("district")),
+    (5, param("subdistrict")),
+    (6, data("name")),
+    (7, data("name")),
+    (8, data("lat")),
+    (9, data("lon")),
+    ("constructionstage", PREV),
+    ("accessibility", PREV),
+    ("activationstage", PREV),
+    ("hierarchytype", PREV),
+    ("pole height", data("height")),
+    ("vendorname", param("vendor")),
+    ("installationyear", param("year")),
+    ("productionyear", param("year")),
+    ("installationdate", param("date")),
+    ("remarks", data("remarks")),
+    ("poletype", data("folder")),
+])
 
-    headers = _cached_headers or sheet.row_values(1)
-    _cached_headers = headers
-    header_map = {name.strip().lower(): i for i, name in enumerate(headers)}
+# Tiang dengan jenis ini ditandai SUBFEEDER di kolom remarks
+SUBFEEDER_POLE_TYPES = ('7m4inch', '9m4inch')
 
-    values = sheet.get_all_values()
-    for i in range(len(values)-1, 0, -1):
-        if any(values[i]):
-            prev_row = values[i]
-            break
-    else:
-        prev_row = [""] * len(headers)
+def build_pole_rows(template, poles, district, subdistrict, vendor):
+    if not len(poles):
+        return []
 
-    _cached_prev_row = prev_row
+    header_map = template.header_map
+    prev_row = template.prev_row
 
     today = datetime.today()
     formatted_date = today.strftime("%d/%m/%Y") if prev_row[header_map.get('installationdate', 0)].count("/") == 2 else today.strftime("%Y-%m-%d")
 
-    count_types = {"7m3inch": 0, "7m4inch": 0, "9m4inch": 0}
+    builder = POLE_SCHEMA.compile(template, district=district.upper(), subdistrict=subdistrict.upper(),
+                                  vendor=vendor.upper(), year=str(today.year), date=formatted_date)
 
-    district = district.upper()
-    subdistrict = subdistrict.upper()
-    vendor = vendor.upper()
+    names = values(poles, 'name')
+    folders = values(poles, 'folder')
+    return builder.rows({
+        'name': names,
+        'lat': values(poles, 'lat'),
+        'lon': values(poles, 'lon'),
+        'height': values(poles, 'height'),
+        'folder': folders,
+        'remarks': ["SUBFEEDER" if f in SUBFEEDER_POLE_TYPES else "CLUSTER" for f in folders],
+    })
 
-    all_rows = []
+def pole_summary(poles, kmz_name=None):
+    count_types = {"7m3inch": 0, "7m4inch": 0, "9m4inch": 0}
     for pole in poles:
         count_types[pole['folder']] += 1
 
-        row = [""] * len(headers)
-        row[0:4] = prev_row[0:4]
-        row[4] = district
-        row[5] = subdistrict
-        row[6] = pole['name']
-        row[7] = pole['name']
-        row[8] = pole['lat']
-        row[9] = pole['lon']
-
-        # Copy beberapa kolom dari prev_row
-        for col in ['constructionstage', 'accessibility', 'activationstage', 'hierarchytype']:
-            if col in header_map:
-                row[header_map[col]] = prev_row[header_map[col]]
+    title = f"Ringkasan Pengunggahan {kmz_name}" if kmz_name else "Ringkasan Pengunggahan"
+    return f"""
+📊 **{title}**:
+✅ 7m3inch: {count_types['7m3inch']} titik
+✅ 7m4inch: {count_types['7m4inch']} titik
+✅ 9m4inch: {count_types['9m4inch']} titik
+"""
 
-        for col in ['pole height', 'vendorname', 'installationyear', 'productionyear', 'installationdate', 'remarks']:
-            idx = header_map.get(col.lower())
-            if idx is not None:
-                if col.lower() == 'pole height':
-                    row[idx] = pole['height']
-                elif col.lower() == 'vendorname':
-                    row[idx] = vendor
-                elif col.lower() in ['installationyear', 'productionyear']:
-                    row[idx] = str(today.year)
-                elif col.lower() == 'installationdate':
-                    row[idx] = formatted_date
-                elif col.lower() == 'remarks':
-                    if pole['folder'] in ['7m4inch', '9m4inch']:
-                        row[idx] = "SUBFEEDER"
-                    else:
-                        row[idx] = "CLUSTER"
-
-        if 'poletype' in header_map:
-            row[header_map['poletype']] = pole['folder']
-
-        all_rows.append(row)
-
-    sheet.append_rows(all_rows)
+def append_poles_to_main_sheet(sheet, poles, district, subdistrict, vendor, sink=None):
+    template = SheetTemplate(sheet, probe_col=PROBE_COL)
+    all_rows = build_pole_rows(template, poles, district, subdistrict, vendor)
+    if sink is not None:
+        sink.write(sheet.title, template.headers, all_rows)
+    else:
+        append_rows_chunked(sheet, all_rows, probe_col=PROBE_COL)
+    st.info(pole_summary(poles))
@@ -1,57 +1,26 @@
-import re
-from datetime import datetime
+import streamlit as st
+from cable_length import route_lengths, mismatch_message
+from cable_rows import SUBFEEDER_CABLE_SCHEMA, KEY_COLUMNS, PROBE_COL, build_cable_rows
+from sheet_template import SheetTemplate
+from sheet_writer import append_rows_chunked
 
-def append_subfeeder_cable(sheet, cable_data, district, subdistrict, vendor, kmz_name):
-    existing_rows = sheet.get_all_values()
-    rows = []
 
-    # Gunakan baris sebelum terakhir sebagai template
-    template_row = existing_rows[-2] if len(existing_rows) > 2 else []
+def build_subfeeder_cable_rows(template, cable_data, lengths, district, subdistrict, vendor, kmz_name,
+                               links=None):
+    return build_cable_rows(SUBFEEDER_CABLE_SCHEMA, template, cable_data, lengths, vendor, kmz_name, links)
 
-    for cable in cable_data:
-        name = cable.get("name", "")
-        description = cable.get("description", "") 
-        normalized_name = name.upper().replace(" ", "").replace("-", "")
-        coords = []
+def append_subfeeder_cable(sheet, cable_data, district, subdistrict, vendor, kmz_name, sink=None):
+    lengths, mismatches = route_lengths(cable_data)
+    if mismatches:
+        st.warning(mismatch_message(mismatches))
 
-        # Siapkan baris baru dengan panjang template
-        row = [""] * len(template_row)
-        row[0] = name
-        row[1] = name
-        row[2:6] = template_row[2:6]
-        row[10] = template_row[10]
-        row[11] = template_row[11]
-        row[20] = template_row[20]  # Kolom U (index 20)
-        row[21] = template_row[21]  # Kolom V (index 21)
-        row[22] = vendor            # Kolom W
-        row[24] = datetime.today().strftime("%d/%m/%Y")  # Kolom Y
-        row[35] = template_row[35]  # Kolom AJ
-        row[36] = kmz_name          # Kolom AK
-        row[38] = vendor            # Kolom AM
-
-        match_fo = re.search(r"\(FO\s*(\d+)C/(\d+)T\)", row[0].upper())
-        if match_fo:
-            row[9] = match_fo.group(2)   # Kolom J
-            row[12] = match_fo.group(1)  # Kolom M
-        
-        # === Kolom Q (index 16) === Ambil angka setelah AE xxxx M
-        match = re.search(r"AE\s*[-]?\s*(\d+)\s*M", name.upper())
-        if match:
-            row[16] = match.group(1)
-
-        # === Kolom P (index 15): Hitung panjang lintasan (meter) ===
-        # ✅ Kolom P (index 15)
-        # === Kolom P (index 15): ambil dari deskripsi jika ada "Total Route : xxxM" ===
-        length_from_desc = ""
-        desc_match = re.search(r"Total\s+Route\s*:\s*(\d+)\s*M", description, re.IGNORECASE)
-        if desc_match:
-            length_from_desc = desc_match.group(1)
-            row[15] = length_from_desc  # gunakan hasil dari deskripsi
-
-        rows.append(row)
+    template = SheetTemplate(sheet, probe_col=PROBE_COL)
+    rows = build_subfeeder_cable_rows(template, cable_data, lengths, district, subdistrict, vendor, kmz_name)
 
     # Tambah ke sheet jika ada baris baru
-    if rows:
-        sheet.append_rows(rows, value_input_option="USER_ENTERED")
+    if sink is not None:
+        sink.write(sheet.title, template.headers, rows)
+    elif rows:
+        append_rows_chunked(sheet, rows, value_input_option="USER_ENTERED", probe_col=PROBE_COL)
 
     return len(rows)
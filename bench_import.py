@@ -0,0 +1,62 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+# Waktu import dwg.py (start aplikasi Streamlit) di proses Python baru, di
+# luar import streamlit sendiri. Gagal (exit 1) bila melewati anggaran waktu
+# atau bila modul berat ikut ter-import sebelum tahap yang memakainya.
+#
+#   python bench_import.py [--budget-ms 50] [--repeat 5]
+
+# Modul yang baru boleh dimuat saat parse / build_jobs / kirim / export DXF
+HEAVY_MODULES = ("numpy", "pandas", "pyarrow", "shapely", "pyproj", "gspread", "google.oauth2", "fastkml")
+
+_PROBE = """
+import json, sys, time
+sys.path.insert(0, {root!r})
+import streamlit
+before = set(sys.modules)
+start = time.perf_counter()
+import {module}
+seconds = time.perf_counter() - start
+print(json.dumps({{"seconds": seconds, "loaded": sorted(set(sys.modules) - before)}}))
+"""
+
+
+def probe(module, root):
+    # Satu proses baru per pengukuran: cache import tidak terbawa antar percobaan
+    result = subprocess.run([sys.executable, "-c", _PROBE.format(root=root, module=module)],
+                            capture_output=True, text=True, check=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark waktu import aplikasi (cold start) dengan anggaran")
+    parser.add_argument("--module", default="dwg")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, default=50.0,
+                        help="batas waktu import terbaik, di luar import streamlit")
+    args = parser.parse_args(argv)
+
+    root = os.path.dirname(os.path.abspath(__file__))
+    runs = [probe(args.module, root) for _ in range(args.repeat)]
+    best = min(run["seconds"] for run in runs) * 1000
+    loaded = runs[-1]["loaded"]
+    heavy = [name for name in HEAVY_MODULES if name in loaded]
+    print(f"import {args.module}: {best:.1f} ms terbaik dari {args.repeat} (batas {args.budget_ms:g} ms), "
+          f"{len(loaded)} modul baru")
+
+    failed = False
+    if heavy:
+        print(f"❌ modul berat ter-import saat start: {', '.join(heavy)}")
+        failed = True
+    if best > args.budget_ms:
+        print(f"❌ waktu import {best:.1f} ms melewati batas {args.budget_ms:g} ms")
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,57 @@
+import argparse
+import sys
+import time
+from io import BytesIO
+
+from kmz_reader import read_kmz, points_view, combined_view
+from synthetic_kmz import write_kmz
+
+
+def build_nested_kmz(n_placemarks, depth, seed=0):
+    # KMZ template EMR dengan folder kategori yang dibungkus `depth` folder
+    buf = BytesIO()
+    counts = write_kmz(buf, n_placemarks, depth=depth, seed=seed)
+    return buf.getvalue(), sum(counts.values())
+
+
+def time_parse(kmz_bytes, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        data = read_kmz(BytesIO(kmz_bytes))
+        points_view(data)
+        combined_view(data)
+        best = min(best, time.perf_counter() - start)
+    return best, len(data)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark parse KMZ bersarang (harus linear terhadap jumlah placemark)")
+    parser.add_argument("--sizes", default="2000,8000,32000")
+    parser.add_argument("--depth", type=int, default=8)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--max-ratio", type=float, default=1.5,
+                        help="batas rasio waktu/placemark antara ukuran terbesar dan terkecil")
+    args = parser.parse_args(argv)
+
+    results = []
+    for size in [int(s) for s in args.sizes.split(",")]:
+        kmz_bytes, expected = build_nested_kmz(size, args.depth)
+        elapsed, parsed = time_parse(kmz_bytes, args.repeat)
+        if parsed != expected:
+            print(f"❌ {parsed} placemark terbaca, seharusnya {expected} (ada yang dikunjungi ulang/hilang)")
+            return 1
+        per_pm = elapsed / parsed * 1e6
+        results.append(per_pm)
+        print(f"{parsed:>9} placemark  depth={args.depth}  {elapsed * 1000:9.1f} ms  {per_pm:6.2f} us/placemark")
+
+    ratio = results[-1] / results[0]
+    print(f"rasio us/placemark terbesar/terkecil: {ratio:.2f} (batas {args.max_ratio})")
+    if ratio > args.max_ratio:
+        print("❌ Waktu parse tidak lagi linear terhadap jumlah placemark")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,222 @@
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+# Semua I/O sheet ke fake_sheets di memori, index dedup ke file sementara
+os.environ.setdefault("TARADWG_FAKE_SHEETS", ":memory:")
+os.environ.setdefault("TARADWG_DEDUP_DB", os.path.join(tempfile.mkdtemp(prefix="taradwg-bench-"), "dedup.sqlite"))
+
+import append_cable_pekanbaru  # noqa: E402
+import append_fat_to_sheet  # noqa: E402
+import append_fdt_to_sheet  # noqa: E402
+import append_poles_to_main_sheet  # noqa: E402
+import append_subfeeder_cable  # noqa: E402
+import parse_cache  # noqa: E402
+import pipeline  # noqa: E402
+import sheet_writer  # noqa: E402
+import sheets_client  # noqa: E402
+from cable_join import join_cables  # noqa: E402
+from cable_length import route_lengths  # noqa: E402
+from dwg import extract_points_from_kmz, extract_kmz_data_combined  # noqa: E402
+from kmz_reader import read_kmz  # noqa: E402
+from nearest_pole import PoleIndex, FAT_PARENT_TYPES, FDT_PARENT_TYPES  # noqa: E402
+from sheet_template import SheetTemplate  # noqa: E402
+from synthetic_kmz import write_kmz  # noqa: E402
+
+SHEET_WIDTH = 50
+
+
+def _header(named):
+    headers = [f"COL {i}" for i in range(SHEET_WIDTH)]
+    for idx, name in named.items():
+        headers[idx] = name
+    return headers
+
+
+# Header + 2 baris template untuk tiap sheet tujuan (kolom yang dibaca writer)
+TEMPLATES = {
+    (pipeline.SPREADSHEET_ID, pipeline.SHEET_NAME): _header({
+        6: "name", 8: "latitude", 9: "longitude", 10: "constructionstage", 11: "accessibility",
+        12: "activationstage", 13: "hierarchytype", 14: "pole height", 15: "vendorname",
+        16: "installationyear", 17: "productionyear", 18: "installationdate", 19: "remarks", 20: "poletype"}),
+    (pipeline.SPREADSHEET_ID_2, pipeline.SHEET_NAME_2): _header({
+        7: "fat name", 26: "installation_date", 32: "parentid 1", 33: "parent_type 1", 34: "fat type",
+        37: "vendor name"}),
+    (pipeline.SPREADSHEET_ID_3, pipeline.SHEET_NAME_3): _header({8: "fdt name", 46: "parentid 1"}),
+    (pipeline.SPREADSHEET_ID_4, pipeline.SHEET_NAME_4): _header({0: "cable name"}),
+    (pipeline.SPREADSHEET_ID_5, pipeline.SHEET_NAME_5): _header({0: "cable name"}),
+}
+
+
+def seed_sheets(client):
+    for (spreadsheet_id, title), headers in TEMPLATES.items():
+        template = [f"T{i}" for i in range(SHEET_WIDTH)]
+        template[0] = "FDT 48" if title == pipeline.SHEET_NAME_3 else template[0]
+        rows = [headers, list(template), list(template)]
+        client.seed(spreadsheet_id, title, rows)
+
+
+def measure(stages, name, fn, items):
+    # Peak memori per tahap via tracemalloc (None kalau --no-memory)
+    tracing = tracemalloc.is_tracing()
+    if tracing:
+        tracemalloc.reset_peak()
+        base, _ = tracemalloc.get_traced_memory()
+    start = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - start
+    if tracing:
+        _, peak = tracemalloc.get_traced_memory()
+    n = items(result) if callable(items) else items
+    stages[name] = {
+        "seconds": round(elapsed, 6),
+        "items": n,
+        "items_per_second": round(n / elapsed, 1) if elapsed > 0 else None,
+        "peak_mb": round((peak - base) / 2 ** 20, 3) if tracing else None,
+    }
+    return result
+
+
+def run_size(n_placemarks, depth, chunk_size, workdir):
+    path = os.path.join(workdir, f"synthetic_{n_placemarks}.kmz")
+    start = time.perf_counter()
+    write_kmz(path, n_placemarks, depth=depth)
+    generate_seconds = time.perf_counter() - start
+
+    stages = {}
+    # Kedua extractor membaca lewat parse_cache: cache dikosongkan dulu supaya
+    # yang diukur parse KMZ, bukan cache hit dari tahap sebelumnya
+    parse_cache.default_cache.clear()
+    fat_points, poles, poles_subfeeder = measure(
+        stages, "extract_points_from_kmz", lambda: extract_points_from_kmz(path),
+        lambda r: sum(len(x) for x in r))
+    parse_cache.default_cache.clear()
+    folders, poles_all = measure(
+        stages, "extract_kmz_data_combined", lambda: extract_kmz_data_combined(path),
+        lambda r: sum(len(v) for v in r[0].values()))
+
+    def assign_parents():
+        fat_parents = PoleIndex(poles_subfeeder, FAT_PARENT_TYPES).nearest(fat_points)[0]
+        fdt_parents = PoleIndex(poles_all, FDT_PARENT_TYPES).nearest(folders.get("FDT", []))[0]
+        return fat_parents, fdt_parents
+    measure(stages, "nearest_pole", assign_parents, len(fat_points) + len(folders.get("FDT", [])))
+
+    dist_cables = folders.get("DISTRIBUTION CABLE", [])
+    sub_cables = folders.get("CABLE", [])
+    dist_lengths, _ = measure(stages, "cable_length.distribution", lambda: route_lengths(dist_cables), len(dist_cables))
+    sub_lengths, _ = measure(stages, "cable_length.subfeeder", lambda: route_lengths(sub_cables), len(sub_cables))
+    dist_links = measure(stages, "cable_join.distribution",
+                         lambda: join_cables(dist_cables, folders.get("FDT"), folders.get("FAT"), poles_all),
+                         len(dist_cables))
+    sub_links = measure(stages, "cable_join.subfeeder",
+                        lambda: join_cables(sub_cables, folders.get("FDT"), folders.get("FAT"), poles_all),
+                        len(sub_cables))
+
+    # Row building memakai template dari fake sheet (baca template tidak dihitung)
+    sheets_client.invalidate()
+    client = sheets_client.get_client()
+    seed_sheets(client)
+
+    def template(spreadsheet_id, title, probe_col):
+        return SheetTemplate(client.open_by_key(spreadsheet_id).worksheet(title), probe_col=probe_col)
+
+    args = ("DISTRICT", "SUBDISTRICT", "VENDOR")
+    t = template(pipeline.SPREADSHEET_ID, pipeline.SHEET_NAME, append_poles_to_main_sheet.PROBE_COL)
+    measure(stages, "build_rows.poles", lambda: append_poles_to_main_sheet.build_pole_rows(t, poles, *args), len)
+    t = template(pipeline.SPREADSHEET_ID_2, pipeline.SHEET_NAME_2, append_fat_to_sheet.PROBE_COL)
+    measure(stages, "build_rows.fat",
+            lambda: append_fat_to_sheet.build_fat_rows(t, fat_points, poles_subfeeder, *args), len)
+    t = template(pipeline.SPREADSHEET_ID_3, pipeline.SHEET_NAME_3, append_fdt_to_sheet.PROBE_COL)
+    measure(stages, "build_rows.fdt",
+            lambda: append_fdt_to_sheet.build_fdt_rows(t, folders.get("FDT", []), poles_all, *args, "BENCH"), len)
+    t = template(pipeline.SPREADSHEET_ID_4, pipeline.SHEET_NAME_4, append_cable_pekanbaru.PROBE_COL)
+    measure(stages, "build_rows.cable_pekanbaru",
+            lambda: append_cable_pekanbaru.build_cable_pekanbaru_rows(t, dist_cables, dist_lengths, *args, "BENCH",
+                                                                       dist_links),
+            len)
+    t = template(pipeline.SPREADSHEET_ID_5, pipeline.SHEET_NAME_5, append_subfeeder_cable.PROBE_COL)
+    measure(stages, "build_rows.subfeeder_cable",
+            lambda: append_subfeeder_cable.build_subfeeder_cable_rows(t, sub_cables, sub_lengths, *args, "BENCH",
+                                                                       sub_links),
+            len)
+
+    # Pipeline penuh (template, dedup, build, tulis) terhadap fake sheet
+    store = read_kmz(path)
+    sheets_client.invalidate()
+    client = sheets_client.get_client()
+    seed_sheets(client)
+    # kmz_name per ukuran, supaya tidak dibandingkan dengan revisi ukuran lain
+    jobs, _ = pipeline.build_jobs([(store, f"BENCH-{n_placemarks}")], [], *args)
+    for job in jobs:
+        job.chunk_size = chunk_size
+    results = measure(stages, "sheet_io", lambda: pipeline.dispatch(jobs), lambda r: sum(c for c, _ in r.values()))
+    errors = {label: str(e) for label, (_, e) in results.items() if e is not None}
+
+    return {
+        "placemarks": len(store),
+        "file_bytes": os.path.getsize(path),
+        "generate_seconds": round(generate_seconds, 3),
+        "stages": stages,
+        "api": client.stats(),
+        "errors": errors,
+    }
+
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark end-to-end pipeline KMZ -> sheet dengan KMZ sintetis EMR")
+    parser.add_argument("--sizes", default="1000,10000,100000", help="jumlah placemark, pisahkan dengan koma (maks 1000000)")
+    parser.add_argument("--depth", type=int, default=3, help="jumlah folder pembungkus di atas folder kategori")
+    parser.add_argument("--latency", type=float, default=0.0, help="latensi per panggilan fake sheet (detik)")
+    parser.add_argument("--chunk-size", type=int, default=sheet_writer.CHUNK_SIZE)
+    parser.add_argument("--write-rate", type=float, default=1000.0,
+                        help="request/detik untuk limiter (fake tidak punya kuota; pakai 1.0 untuk meniru kuota asli)")
+    parser.add_argument("--no-memory", action="store_true", help="matikan tracemalloc (timing lebih akurat)")
+    parser.add_argument("--output", help="tulis hasil JSON ke file (default: stdout)")
+    args = parser.parse_args(argv)
+
+    os.environ["TARADWG_FAKE_LATENCY"] = str(args.latency)
+    for limiter in (sheet_writer.WRITE_LIMITER, sheet_writer.READ_LIMITER):
+        limiter.rate = limiter.capacity = args.write_rate
+
+    if not args.no_memory:
+        tracemalloc.start()
+    results = []
+    with tempfile.TemporaryDirectory(prefix="taradwg-bench-") as workdir:
+        for size in [int(s) for s in args.sizes.split(",")]:
+            results.append(run_size(size, args.depth, args.chunk_size, workdir))
+            print(f"{size:>9} placemark selesai", file=sys.stderr)
+    tracemalloc.stop()
+
+    report = {
+        "benchmark": "taradwg-pipeline",
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "git_commit": _git_commit(),
+        "python": platform.python_version(),
+        "params": vars(args),
+        "results": results,
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text)
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
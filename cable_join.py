@@ -0,0 +1,132 @@
+import numpy as np
+import shapely
+
+from cable_length import ragged_coordinates
+from instrumentation import stage
+from nearest_pole import point_columns, project
+
+# Sambungan kabel ke FDT / FAT / tiang dari KMZ yang sama. Semua vertex semua
+# kabel di-snap sekaligus (satu query STRtree "dwithin") ke node dalam radius
+# SNAP_TOLERANCE_M; kalau beberapa node masuk radius, yang hierarkinya lebih
+# tinggi menang, lalu yang terdekat. Dari kedua ujung kabel: node dengan
+# hierarki lebih tinggi jadi parent, yang lain child; kalau setara, vertex
+# pertama (arah gambar) dianggap hulu.
+
+SNAP_TOLERANCE_M = 5.0
+
+# Urutan = hierarki node, parent lebih dulu
+NODE_TYPES = ("FDT", "FAT", "POLE")
+
+# Jumlah nama kabel yang ditampilkan di peringatan
+MAX_LISTED = 20
+
+
+class CableLinks:
+    def __init__(self, n):
+        self.parent = [""] * n
+        self.parent_type = [""] * n
+        self.child = [""] * n
+        self.child_type = [""] * n
+        # (nama kabel, ujung lepas 0-2, segmen yang salah satu vertexnya tanpa node)
+        self.unconnected = []
+
+    def columns(self):
+        # Kolom data untuk RowSchema kabel
+        return {"parent": self.parent, "parent_type": self.parent_type,
+                "child": self.child, "child_type": self.child_type}
+
+
+def _nodes(fdt, fat, poles):
+    lat, lon, names, ranks = [], [], [], []
+    for rank, items in enumerate((fdt, fat, poles)):
+        if items is None or not len(items):
+            continue
+        la, lo, nm = point_columns(items)
+        valid = ~(np.isnan(la) | np.isnan(lo))
+        lat.append(la[valid])
+        lon.append(lo[valid])
+        names += [n for n, ok in zip(nm, valid) if ok]
+        ranks.append(np.full(int(valid.sum()), rank, dtype=np.int8))
+    if not names:
+        return np.empty(0), np.empty(0), [], np.empty(0, dtype=np.int8)
+    return np.concatenate(lat), np.concatenate(lon), names, np.concatenate(ranks)
+
+
+def _snap(vx, vy, nx, ny, ranks, tolerance):
+    # Index node untuk tiap vertex (-1 bila tidak ada node dalam radius)
+    best = np.full(len(vx), -1, dtype=np.intp)
+    if not len(nx) or not len(vx):
+        return best
+    vertices = shapely.points(vx, vy)
+    nodes = shapely.points(nx, ny)
+    src, dst = shapely.STRtree(nodes).query(vertices, predicate="dwithin", distance=tolerance)
+    if not len(src):
+        return best
+    dist = shapely.distance(vertices[src], nodes[dst])
+    order = np.lexsort((dist, ranks[dst], src))
+    src, dst = src[order], dst[order]
+    first = np.r_[True, src[1:] != src[:-1]]
+    best[src[first]] = dst[first]
+    return best
+
+
+def join_cables(cables, fdt=None, fat=None, poles=None, tolerance=SNAP_TOLERANCE_M):
+    # cables: PlacemarkView / list dict kabel; fdt, fat, poles: titik dari KMZ yang sama
+    n = len(cables)
+    links = CableLinks(n)
+    if not n:
+        return links
+
+    with stage("cable_join", rows=n):
+        lon, lat, start, end = ragged_coordinates(cables)
+        counts = np.asarray(end - start, dtype=np.int64)
+        total = int(counts.sum())
+        owner = np.repeat(np.arange(n), counts)
+        first = np.cumsum(counts) - counts
+        vertex = np.asarray(start)[owner] + (np.arange(total) - first[owner])
+        vlat, vlon = lat[vertex], lon[vertex]
+
+        node_lat, node_lon, node_names, ranks = _nodes(fdt, fat, poles)
+        ref_lat, ref_lon = (node_lat, node_lon) if len(node_lat) else (vlat, vlon)
+        lat0 = float(np.nanmean(ref_lat)) if len(ref_lat) else 0.0
+        lon0 = float(np.nanmean(ref_lon)) if len(ref_lon) else 0.0
+        best = _snap(*project(vlat, vlon, lat0, lon0), *project(node_lat, node_lon, lat0, lon0), ranks, tolerance)
+
+        # Segmen (vertex k -> k+1 dalam kabel yang sama) yang salah satu ujungnya lepas
+        snapped = best >= 0
+        same = owner[:-1] == owner[1:]
+        loose = same & ~(snapped[:-1] & snapped[1:])
+        loose_count = np.bincount(owner[:-1][loose], minlength=n)
+
+        # Node di vertex pertama (a) & terakhir (b); kabel satu titik hanya punya a
+        has = counts > 0
+        last = np.where(has, first + counts - 1, 0)
+        a = np.where(has, best[np.where(has, first, 0)] if total else -1, -1)
+        b = np.where(counts > 1, best[last] if total else -1, -1)
+        rank = np.append(ranks, len(NODE_TYPES))
+        swap = (b >= 0) & (rank[b] < rank[a])
+        a, b = np.where(swap, b, a), np.where(swap, a, b)
+        dangling = np.where(has, (a < 0).astype(int) + ((b < 0) & (counts > 1)), 2)
+
+        cable_names = cables.names if hasattr(cables, "names") else [c.get("name", "") for c in cables]
+        types = [NODE_TYPES[r] for r in ranks.tolist()]
+        for i, (p, c) in enumerate(zip(a.tolist(), b.tolist())):
+            if p >= 0:
+                links.parent[i], links.parent_type[i] = node_names[p], types[p]
+            if c >= 0:
+                links.child[i], links.child_type[i] = node_names[c], types[c]
+        for i in np.flatnonzero(dangling | loose_count).tolist():
+            links.unconnected.append((cable_names[i], int(dangling[i]), int(loose_count[i])))
+    return links
+
+
+def unconnected_message(links, tolerance=SNAP_TOLERANCE_M):
+    items = []
+    for name, dangling, loose in links.unconnected[:MAX_LISTED]:
+        parts = ([f"{dangling} ujung lepas"] if dangling else []) + ([f"{loose} segmen tanpa tiang"] if loose else [])
+        items.append(f"{name} ({', '.join(parts)})")
+    more = len(links.unconnected) - MAX_LISTED
+    if more > 0:
+        items.append(f"dan {more} kabel lainnya")
+    return (f"⚠️ {len(links.unconnected)} kabel tidak tersambung penuh ke FDT/FAT/tiang "
+            f"(toleransi {tolerance:g} m): " + ", ".join(items))
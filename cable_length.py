@@ -0,0 +1,86 @@
+import re
+
+import numpy as np
+from pyproj import Geod
+
+GEOD = Geod(ellps="WGS84")
+
+ROUTE_PATTERN = re.compile(r"Total\s+Route\s*:\s*(\d+)\s*M", re.IGNORECASE)
+
+# Dari nama kabel: "(FO 48C/4T)" -> core & tube, "AE 350 M" -> panjang aerial
+FO_PATTERN = re.compile(r"\(FO\s*(\d+)C/(\d+)T\)")
+AE_PATTERN = re.compile(r"AE\s*[-]?\s*(\d+)\s*M")
+
+# Selisih relatif maksimum antara "Total Route" di deskripsi dan panjang
+# geometri sebelum diberi peringatan (deskripsi biasanya sudah termasuk slack).
+LENGTH_TOLERANCE = 0.2
+
+
+def ragged_coordinates(cables):
+    # PlacemarkView: vertex sudah tersimpan rapat di store.
+    if hasattr(cables, "coordinate_ranges"):
+        start, end = cables.coordinate_ranges()
+        return cables.store.coord_lon, cables.store.coord_lat, start, end
+
+    coords = [cable.get("coordinates") or [] for cable in cables]
+    counts = np.array([len(c) for c in coords], dtype=np.int64)
+    end = np.cumsum(counts)
+    flat = np.array([pt for c in coords for pt in c], dtype=np.float64).reshape(-1, 2)
+    return flat[:, 0], flat[:, 1], end - counts, end
+
+
+def geodesic_lengths(cables):
+    # Panjang (meter) semua kabel sekaligus: satu panggilan Geod.inv untuk
+    # seluruh segmen, lalu dijumlahkan per kabel.
+    lon, lat, start, end = ragged_coordinates(cables)
+    n_segments = np.maximum(end - start - 1, 0)
+    lengths = np.zeros(len(start))
+    total = int(n_segments.sum())
+    if not total:
+        return lengths
+
+    owner = np.repeat(np.arange(len(start)), n_segments)
+    first = np.cumsum(n_segments) - n_segments
+    seg_start = start[owner] + (np.arange(total) - first[owner])
+    _, _, dist = GEOD.inv(lon[seg_start], lat[seg_start], lon[seg_start + 1], lat[seg_start + 1])
+    return np.bincount(owner, weights=dist, minlength=len(start))
+
+
+def route_lengths(cables):
+    # Nilai kolom P: pakai "Total Route : xxxM" dari deskripsi bila ada,
+    # kalau tidak pakai panjang geodesik dari LineString. Kabel yang selisihnya
+    # melebihi LENGTH_TOLERANCE dikembalikan di `mismatches`.
+    computed = geodesic_lengths(cables)
+    values, mismatches = [], []
+
+    for cable, length in zip(cables, computed):
+        match = ROUTE_PATTERN.search(cable.get("description", "") or "")
+        if match:
+            declared = int(match.group(1))
+            values.append(match.group(1))
+            if length > 0 and abs(declared - length) > LENGTH_TOLERANCE * max(declared, length):
+                mismatches.append((cable.get("name", ""), declared, round(length)))
+        elif length > 0:
+            values.append(str(round(length)))
+        else:
+            values.append("")
+
+    return values, mismatches
+
+
+def name_fields(names):
+    # Kolom core, tube dan AE untuk semua nama kabel sekaligus ("" bila tidak ada)
+    cores, tubes, aerial = [], [], []
+    for name in names:
+        upper = name.upper()
+        fo = FO_PATTERN.search(upper)
+        ae = AE_PATTERN.search(upper)
+        cores.append(fo.group(1) if fo else "")
+        tubes.append(fo.group(2) if fo else "")
+        aerial.append(ae.group(1) if ae else "")
+    return cores, tubes, aerial
+
+
+def mismatch_message(mismatches):
+    return ("⚠️ Total Route di deskripsi beda jauh dengan panjang garis di KMZ: " +
+            ", ".join(f"{name} ({declared}M vs {length}M)" for name, declared, length in mismatches))
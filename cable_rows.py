@@ -0,0 +1,64 @@
+from datetime import datetime
+
+from cable_join import CableLinks
+from cable_length import name_fields
+from row_schema import RowSchema, TEMPLATE, data, param, values
+
+# Sheet kabel distribusi (Pekanbaru) dan kabel subfeeder memakai susunan
+# kolom yang sama; sheet subfeeder hanya menambah vendor di kolom W.
+
+# Kolom A (nama kabel) dipakai untuk mencari baris terakhir
+PROBE_COL = 1
+# Kolom kunci dedup: kabel tidak punya lat/lon di sheet; nama cukup unik
+# per RFS (kolom AK, kmz_name)
+KEY_COLUMNS = (0, None, None, 36)
+
+# Susunan kolom sheet kabel; lebar baris = panjang baris template
+CABLE_FIELDS = [
+    (0, data("name")),
+    (1, data("name")),
+    (range(2, 6), TEMPLATE),
+    (10, TEMPLATE),
+    (11, TEMPLATE),
+    (20, TEMPLATE),                 # Kolom U
+    (21, TEMPLATE),                 # Kolom V
+    (24, param("date")),            # Kolom Y
+    (35, TEMPLATE),                 # Kolom AJ
+    (36, param("kmz_name")),        # Kolom AK
+    (38, param("vendor")),          # Kolom AM
+    (9, data("tubes")),             # Kolom J, dari "(FO xxC/yyT)"
+    (12, data("cores")),            # Kolom M
+    (16, data("aerial")),           # Kolom Q, angka setelah "AE xxxx M"
+    (15, data("length")),           # Kolom P: "Total Route : xxxM" atau panjang geodesik
+    # Sambungan hasil cable_join (dilewati bila header tidak ada di sheet)
+    ("parentid 1", data("parent")),
+    ("parent_type 1", data("parent_type")),
+    ("childid 1", data("child")),
+    ("child_type 1", data("child_type")),
+]
+
+CABLE_SCHEMA = RowSchema(CABLE_FIELDS, width="template")
+SUBFEEDER_CABLE_SCHEMA = RowSchema(CABLE_FIELDS + [
+    (22, param("vendor")),          # Kolom W
+], width="template")
+
+
+def build_cable_rows(schema, template, cable_data, lengths, vendor, kmz_name, links=None):
+    if not len(cable_data):
+        return []
+
+    builder = schema.compile(template, vendor=vendor, kmz_name=kmz_name,
+                             date=datetime.today().strftime("%d/%m/%Y"))
+
+    names = values(cable_data, "name", "")
+    cores, tubes, aerial = name_fields(names)
+    # links: CableLinks dari cable_join; tanpa itu kolom sambungan dikosongkan
+    links = links or CableLinks(len(names))
+    return builder.rows({
+        "name": names,
+        "cores": cores,
+        "tubes": tubes,
+        "aerial": aerial,
+        "length": lengths,
+        **links.columns(),
+    })
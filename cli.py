@@ -0,0 +1,119 @@
+import argparse
+import logging
+import os
+import sys
+
+from parse_cache import read_groups
+from row_sink import FORMATS, ColumnarSink, JsonSink
+
+# Mode batch tanpa Streamlit: banyak KMZ RFS sekaligus. Parsing KMZ (bagian
+# yang berat di CPU) jalan paralel di process pool; baris semua file digabung
+# per sheet tujuan lalu tiap sheet ditulis sebagai satu rangkaian append.
+#
+#   python cli.py CLUSTER_DIR/ --subfeeder SF1.kmz SF2.kmz \
+#       --district KAMPAR --subdistrict SIAK HULU --vendor ABC \
+#       --credentials service_account.json [--dry-run hasil.json | --dry-run hasil/ --format csv]
+
+
+def kmz_paths(paths):
+    # File .kmz langsung, atau semua .kmz di dalam folder (tidak rekursif)
+    found = []
+    for path in paths:
+        if os.path.isdir(path):
+            found += sorted(os.path.join(path, f) for f in os.listdir(path) if f.lower().endswith(".kmz"))
+        else:
+            found.append(path)
+    return found
+
+
+def kmz_name(path):
+    return os.path.basename(path).replace(".kmz", "")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Kirim banyak KMZ template EMR ke spreadsheet (tanpa Streamlit)")
+    parser.add_argument("cluster", nargs="*", help="file .kmz cluster atau folder berisi .kmz")
+    parser.add_argument("--subfeeder", nargs="*", default=[], help="file .kmz subfeeder atau folder berisi .kmz")
+    parser.add_argument("--district", required=True)
+    parser.add_argument("--subdistrict", required=True)
+    parser.add_argument("--vendor", required=True)
+    parser.add_argument("--credentials", help="file JSON service account Google (default: TARADWG_CREDENTIALS)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="jumlah proses untuk parsing KMZ")
+    parser.add_argument("--chunk-size", type=int, help="baris per request append_rows")
+    parser.add_argument("--timing-log", help="tambahkan rincian waktu per tahap (JSON per baris) ke file ini")
+    parser.add_argument("--dry-run", metavar="OUTPUT",
+                        help="jangan tulis ke spreadsheet; simpan baris ke file .json, "
+                             "atau ke folder OUTPUT (satu file per sheet, lihat --format)")
+    parser.add_argument("--format", choices=FORMATS, default="parquet", help="format file dry-run per sheet")
+    args = parser.parse_args(argv)
+
+    if args.credentials:
+        os.environ["TARADWG_CREDENTIALS"] = args.credentials
+    # Log waktu (taradwg.timing, INFO) ke stderr bila logging belum dikonfigurasi
+    logging.basicConfig(format="%(message)s")
+    logging.getLogger("taradwg.timing").setLevel(logging.INFO)
+    from instrumentation import start_run, stage, log_run
+    from pipeline import build_jobs, dispatch, removed_message
+    # Streamlit dipakai tanpa `streamlit run`; peringatan ScriptRunContext tidak relevan
+    for name in list(logging.root.manager.loggerDict):
+        if name.startswith("streamlit"):
+            logging.getLogger(name).setLevel(logging.ERROR)
+
+    clusters_paths = kmz_paths(args.cluster)
+    subfeeder_paths = kmz_paths(args.subfeeder)
+    if not (clusters_paths or subfeeder_paths):
+        parser.error("minimal satu file KMZ cluster atau --subfeeder")
+
+    sink = None
+    if args.dry_run and args.dry_run.lower().endswith(".json"):
+        sink = JsonSink(args.dry_run)
+    elif args.dry_run:
+        sink = ColumnarSink(args.dry_run, args.format)
+
+    run = start_run("cli")
+    # Cluster & subfeeder di-parse bersama dalam satu process pool. Antar run
+    # yang terasa hanya cache disk (TARADWG_PARSE_CACHE_DIR).
+    with stage("parse", rows=len(clusters_paths) + len(subfeeder_paths)):
+        (clusters, subfeeders), errors = read_groups([[(path, kmz_name(path)) for path in clusters_paths],
+                                                      [(path, kmz_name(path)) for path in subfeeder_paths]],
+                                                     args.workers)
+    for name, error in errors:
+        print(f"❌ {name}: {error}", file=sys.stderr)
+    print(f"🔍 {len(clusters)} KMZ cluster, {len(subfeeders)} KMZ subfeeder terbaca")
+
+    with stage("build_jobs"):
+        jobs, notes = build_jobs(clusters, subfeeders, args.district, args.subdistrict, args.vendor)
+    for _, message in notes:
+        print(message, file=sys.stderr)
+    if args.chunk_size:
+        for job in jobs:
+            job.chunk_size = args.chunk_size
+
+    with stage("sheet_io"):
+        results = dispatch(jobs, sink=sink)
+    if sink is not None:
+        for path in sink.close():
+            print(f"📝 Dry-run: baris disimpan ke {path}")
+
+    failed = bool(errors)
+    for job in jobs:
+        if job.label not in results:
+            continue
+        count, error = results[job.label]
+        skipped = f" ({job.skipped} sudah ada, dilewati)" if job.skipped else ""
+        updated = ""
+        if job.updates:
+            updated = f", {len(job.updates)} {'akan diperbarui' if sink is not None else 'diperbarui'}"
+        if error is not None:
+            failed = True
+            print(f"❌ {job.label}: {count} baris, gagal: {error}{skipped}", file=sys.stderr)
+        else:
+            print(f"✅ {job.label}: {count} baris{updated}{skipped}")
+        if job.removed:
+            print(removed_message(job), file=sys.stderr)
+    log_run(run.finish(), args.timing_log)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,154 @@
+import json
+import os
+import sqlite3
+import threading
+
+from sheet_writer import READ_LIMITER, call_with_backoff, col_letter
+
+CACHE_PATH = os.environ.get(
+    "TARADWG_DEDUP_DB",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "dedup_index.sqlite"),
+)
+
+_lock = threading.Lock()
+
+
+def _coord(value):
+    # Koordinat dibulatkan 6 desimal (~10 cm) supaya beda format angka
+    # di sheet tidak dianggap baris baru.
+    try:
+        return f"{round(float(value), 6):.6f}"
+    except (TypeError, ValueError):
+        return str(value).strip() or None
+
+
+def row_key(row, key_columns):
+    # key_columns: (nama, lat, lon, *scope). Kolom scope opsional (mis. RFS /
+    # kmz_name untuk kabel): nama cukup unik di dalam scope yang sama.
+    name_idx, lat_idx, lon_idx, *scope_idx = key_columns
+
+    def cell(idx):
+        return row[idx] if idx is not None and idx < len(row) else None
+
+    name = str(cell(name_idx) or "").strip()
+    lat = _coord(cell(lat_idx)) if lat_idx is not None else None
+    lon = _coord(cell(lon_idx)) if lon_idx is not None else None
+    scope = "\t".join(str(cell(idx) or "").strip() for idx in scope_idx) if scope_idx else None
+    return name, lat, lon, scope
+
+
+def _connect(path):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    db = sqlite3.connect(path)
+    db.execute("CREATE TABLE IF NOT EXISTS state (sheet TEXT PRIMARY KEY, indexed_rows INTEGER, tail TEXT)")
+    columns = [r[1] for r in db.execute("PRAGMA table_info(keys)")]
+    if columns and "scope" not in columns:
+        # Index versi lama tanpa nomor baris / scope: bangun ulang dari sheet
+        db.execute("DROP TABLE keys")
+        db.execute("DELETE FROM state")
+    db.execute("CREATE TABLE IF NOT EXISTS keys (sheet TEXT, name TEXT, lat TEXT, lon TEXT, scope TEXT, "
+               "row INTEGER)")
+    db.execute("CREATE INDEX IF NOT EXISTS keys_sheet ON keys (sheet)")
+    return db
+
+
+class DedupIndex:
+    # Index (sheet, nama, lat, lon, scope) dari baris yang sudah ada di sheet.
+    # Disimpan di SQLite lokal; tiap run hanya membaca baris baru sejak run
+    # sebelumnya. Baris terakhir yang sudah diindex dibaca ulang sebagai cek
+    # revisi: kalau isinya berubah (baris dihapus/diurutkan ulang) index dibangun ulang.
+    # Nomor baris ikut disimpan, untuk update baris di tempat (lihat revision_index).
+    def __init__(self, sheet_key, key_columns, path=CACHE_PATH):
+        self.sheet_key = sheet_key
+        self.key_columns = key_columns
+        self.path = path
+        self.keys = set()
+        # {(nama, scope): nomor baris}; None bila nama itu ada di lebih dari satu baris
+        self.rows = {}
+
+    def _fetch(self, worksheet, first_row, last_row):
+        cols = [c for c in self.key_columns if c is not None]
+        lo, hi = min(cols), max(cols)
+        rng = f"{col_letter(lo)}{first_row}:{col_letter(hi)}{last_row}"
+        # Nilai mentah, bukan teks tampilan: dengan locale id_ID koordinat
+        # tampil "0,5123456" dan tidak bisa dibandingkan sebagai angka
+        values = call_with_backoff(worksheet.batch_get, [rng], value_render_option="UNFORMATTED_VALUE",
+                                   limiter=READ_LIMITER)
+        rows = list(values[0]) if values else []
+        rows += [[]] * (last_row - first_row + 1 - len(rows))
+        shifted = tuple(None if c is None else c - lo for c in self.key_columns)
+        return [row_key(row, shifted) + (first_row + k,) for k, row in enumerate(rows)]
+
+    def sync(self, worksheet, last_row):
+        with _lock:
+            db = _connect(self.path)
+            try:
+                state = db.execute("SELECT indexed_rows, tail FROM state WHERE sheet = ?", (self.sheet_key,)).fetchone()
+                indexed_rows, tail = state if state else (1, None)
+
+                rebuild = indexed_rows > last_row
+                new_keys = []
+                if not rebuild and last_row > 1:
+                    start = max(2, indexed_rows)
+                    fetched = self._fetch(worksheet, start, last_row)
+                    if indexed_rows >= 2:
+                        rebuild = json.dumps(list(fetched[0][:4])) != tail
+                        fetched = fetched[1:]
+                    new_keys = fetched
+
+                if rebuild:
+                    db.execute("DELETE FROM keys WHERE sheet = ?", (self.sheet_key,))
+                    new_keys = self._fetch(worksheet, 2, last_row) if last_row > 1 else []
+
+                db.executemany("INSERT INTO keys VALUES (?, ?, ?, ?, ?, ?)",
+                               [(self.sheet_key,) + key for key in new_keys])
+                if last_row > 1:
+                    last_key = new_keys[-1][:4] if new_keys else json.loads(tail)
+                    db.execute("INSERT OR REPLACE INTO state VALUES (?, ?, ?)",
+                               (self.sheet_key, last_row, json.dumps(list(last_key))))
+                else:
+                    db.execute("DELETE FROM state WHERE sheet = ?", (self.sheet_key,))
+                db.commit()
+
+                self.keys, self.rows = set(), {}
+                for name, lat, lon, scope, row in db.execute("SELECT name, lat, lon, scope, row FROM keys "
+                                                             "WHERE sheet = ? ORDER BY row", (self.sheet_key,)):
+                    self.keys.add((name, lat, lon, scope))
+                    if name:
+                        self.rows[name, scope] = None if (name, scope) in self.rows else row
+            finally:
+                db.close()
+        return self
+
+    def update(self, rows_by_number):
+        # Kunci baris yang baru di-update di tempat ({nomor baris: isi baris})
+        keys = {number: row_key(row, self.key_columns) for number, row in rows_by_number.items()}
+        with _lock:
+            db = _connect(self.path)
+            try:
+                db.executemany("DELETE FROM keys WHERE sheet = ? AND row = ?",
+                               [(self.sheet_key, number) for number in keys])
+                db.executemany("INSERT INTO keys VALUES (?, ?, ?, ?, ?, ?)",
+                               [(self.sheet_key,) + key + (number,) for number, key in keys.items()])
+                # Baris ekor yang dipakai cek revisi ikut berubah
+                db.executemany("UPDATE state SET tail = ? WHERE sheet = ? AND indexed_rows = ?",
+                               [(json.dumps(list(key)), self.sheet_key, number) for number, key in keys.items()])
+                db.commit()
+            finally:
+                db.close()
+        self.keys.update(keys.values())
+
+    def row_number(self, name, scope=None):
+        # Nomor baris placemark `name` di sheet (None: tidak ada / lebih dari satu)
+        return self.rows.get((name, scope))
+
+    def filter(self, rows):
+        # Buang baris yang sudah ada di sheet (atau kembar di batch ini).
+        kept = []
+        for row in rows:
+            key = row_key(row, self.key_columns)
+            if key[0] and key in self.keys:
+                continue
+            self.keys.add(key)
+            kept.append(row)
+        return kept, len(rows) - len(kept)
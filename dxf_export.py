@@ -0,0 +1,210 @@
+import argparse
+import re
+
+import numpy as np
+from pyproj import Transformer
+
+from kmz_reader import POLE_FOLDERS, read_kmz
+from placemark_store import POLE_TYPES
+
+# Export placemark ke DXF R12 (AC1009) yang ditulis langsung ke file: header,
+# tabel layer dan block ditulis dulu, lalu entity per potongan `chunk` baris.
+# Tidak ada objek drawing di memori, jadi 500k entity tetap ringan.
+# DWG adalah format tertutup; file DXF ini dibuka AutoCAD dan bisa di-Save As DWG.
+
+# Folder -> nama block; placemark titik di folder lain jadi POINT biasa
+BLOCK_FOLDERS = {"FAT": "FAT", "FDT": "FDT"}
+BLOCK_FOLDERS.update({folder: "POLE" for folder in POLE_FOLDERS})
+
+# Atribut per block (tag, sumber nilai)
+BLOCK_ATTRIBUTES = {
+    "POLE": ("NAME", "TYPE", "HEIGHT"),
+    "FAT": ("NAME", "DESC"),
+    "FDT": ("NAME", "DESC"),
+}
+
+# Warna ACI per layer, dipakai bergiliran
+LAYER_COLORS = (1, 2, 3, 4, 5, 6, 30, 140, 210)
+
+_LAYER_INVALID = re.compile(r"[^A-Z0-9_$-]")
+
+
+def layer_name(folder):
+    # Nama layer R12: huruf besar, angka, _ $ -, maks 31 karakter
+    name = _LAYER_INVALID.sub("_", folder.strip().upper())[:31]
+    return name or "UNKNOWN"
+
+
+def _text(value):
+    # Teks DXF satu baris; karakter non-ASCII ditulis sebagai \U+XXXX
+    value = str(value)
+    if value.isascii() and "\n" not in value and "\r" not in value:
+        return value
+    value = " ".join(value.split())
+    return "".join(c if ord(c) < 128 else f"\\U+{ord(c):04X}" for c in value)
+
+
+def utm_transformer(store):
+    # Zona UTM dari median semua vertex (satu cluster selalu di satu zona)
+    lon = store.coord_lon[~np.isnan(store.coord_lon)]
+    lat = store.coord_lat[~np.isnan(store.coord_lat)]
+    if not len(lon):
+        lon, lat = np.array([0.0]), np.array([0.0])
+    zone = min(int((np.median(lon) + 180) // 6) + 1, 60)
+    epsg = (32600 if np.median(lat) >= 0 else 32700) + zone
+    return Transformer.from_crs("EPSG:4326", f"EPSG:{epsg}", always_xy=True), epsg
+
+
+def _header(out, extents):
+    (xmin, ymin), (xmax, ymax) = extents
+    out.write("0\nSECTION\n2\nHEADER\n9\n$ACADVER\n1\nAC1009\n9\n$DWGCODEPAGE\n3\nANSI_1252\n"
+              f"9\n$EXTMIN\n10\n{xmin:.3f}\n20\n{ymin:.3f}\n30\n0.0\n"
+              f"9\n$EXTMAX\n10\n{xmax:.3f}\n20\n{ymax:.3f}\n30\n0.0\n"
+              f"9\n$LIMMIN\n10\n{xmin:.3f}\n20\n{ymin:.3f}\n"
+              f"9\n$LIMMAX\n10\n{xmax:.3f}\n20\n{ymax:.3f}\n"
+              "0\nENDSEC\n")
+
+
+def _tables(out, layers):
+    out.write("0\nSECTION\n2\nTABLES\n"
+              "0\nTABLE\n2\nLTYPE\n70\n1\n"
+              "0\nLTYPE\n2\nCONTINUOUS\n70\n0\n3\nSolid line\n72\n65\n73\n0\n40\n0.0\n"
+              "0\nENDTAB\n"
+              f"0\nTABLE\n2\nLAYER\n70\n{len(layers) + 1}\n"
+              "0\nLAYER\n2\n0\n70\n0\n62\n7\n6\nCONTINUOUS\n")
+    for k, layer in enumerate(layers):
+        out.write(f"0\nLAYER\n2\n{layer}\n70\n0\n62\n{LAYER_COLORS[k % len(LAYER_COLORS)]}\n6\nCONTINUOUS\n")
+    out.write("0\nENDTAB\n0\nENDSEC\n")
+
+
+def _square(half):
+    corners = [(-half, -half), (half, -half), (half, half), (-half, half), (-half, -half)]
+    return "".join(f"0\nLINE\n8\n0\n10\n{x1}\n20\n{y1}\n30\n0.0\n11\n{x2}\n21\n{y2}\n31\n0.0\n"
+                   for (x1, y1), (x2, y2) in zip(corners, corners[1:]))
+
+
+def _blocks(out, text_height):
+    shapes = {
+        "POLE": "0\nCIRCLE\n8\n0\n10\n0.0\n20\n0.0\n30\n0.0\n40\n1.0\n",
+        "FAT": _square(1.0),
+        "FDT": _square(1.5) + _square(0.75),
+    }
+    out.write("0\nSECTION\n2\nBLOCKS\n")
+    for block, tags in BLOCK_ATTRIBUTES.items():
+        out.write(f"0\nBLOCK\n8\n0\n2\n{block}\n70\n2\n10\n0.0\n20\n0.0\n30\n0.0\n3\n{block}\n")
+        out.write(shapes[block])
+        for k, tag in enumerate(tags):
+            out.write(f"0\nATTDEF\n8\n0\n10\n2.0\n20\n{-k * text_height * 1.5:.3f}\n30\n0.0\n40\n{text_height}\n"
+                      f"1\n\n3\n{tag}\n2\n{tag}\n70\n0\n")
+        out.write("0\nENDBLK\n8\n0\n")
+    out.write("0\nENDSEC\n")
+
+
+def _extents(store, transformer):
+    lon, lat = store.coord_lon, store.coord_lat
+    if not len(lon) or np.isnan(lon).all():
+        return (0.0, 0.0), (0.0, 0.0)
+    lon_lo, lon_hi = np.nanmin(lon), np.nanmax(lon)
+    lat_lo, lat_hi = np.nanmin(lat), np.nanmax(lat)
+    x, y = transformer.transform([lon_lo, lon_hi, lon_hi, lon_lo], [lat_lo, lat_lo, lat_hi, lat_hi])
+    return (min(x), min(y)), (max(x), max(y))
+
+
+def _entities(out, store, transformer, layers, text_height, chunk):
+    names = store.names.values
+    descriptions = store.descriptions.values
+    folder_blocks = [BLOCK_FOLDERS.get(folder) for folder in store.folders.values]
+    offsets = store.coord_offset
+    count = 0
+
+    out.write("0\nSECTION\n2\nENTITIES\n")
+    for lo in range(0, len(store), chunk):
+        hi = min(lo + chunk, len(store))
+        # Proyeksi semua vertex potongan ini sekaligus (vektor)
+        v_lo, v_hi = offsets[lo], offsets[hi]
+        xs, ys = transformer.transform(store.coord_lon[v_lo:v_hi], store.coord_lat[v_lo:v_hi])
+        xs, ys = xs.tolist(), ys.tolist()
+        starts = (offsets[lo:hi + 1] - v_lo).tolist()
+        folder_codes = store.folder_code[lo:hi].tolist()
+        name_codes = store.name_code[lo:hi].tolist()
+        description_codes = store.description_code[lo:hi].tolist()
+        pole_types = store.pole_type[lo:hi].tolist()
+
+        parts = []
+        for k in range(hi - lo):
+            start, end = starts[k], starts[k + 1]
+            if start == end:
+                continue
+            folder_code = folder_codes[k]
+            layer = layers[folder_code]
+            code = name_codes[k]
+            name = _text(names[code]) if code >= 0 else ""
+
+            if end - start > 1:
+                parts.append(f"0\nPOLYLINE\n8\n{layer}\n66\n1\n70\n0\n10\n0.0\n20\n0.0\n30\n0.0\n")
+                parts.extend(f"0\nVERTEX\n8\n{layer}\n10\n{xs[v]:.3f}\n20\n{ys[v]:.3f}\n30\n0.0\n"
+                             for v in range(start, end))
+                parts.append(f"0\nSEQEND\n8\n{layer}\n")
+                count += 1
+                continue
+
+            x, y = xs[start], ys[start]
+            block = folder_blocks[folder_code]
+            if block is None:
+                parts.append(f"0\nPOINT\n8\n{layer}\n10\n{x:.3f}\n20\n{y:.3f}\n30\n0.0\n")
+                count += 1
+                continue
+
+            if block == "POLE":
+                pole_type, height = POLE_TYPES[pole_types[k]]
+                values = (name, pole_type, height)
+            else:
+                values = (name, _text(descriptions[description_codes[k]]))
+            parts.append(f"0\nINSERT\n8\n{layer}\n66\n1\n2\n{block}\n10\n{x:.3f}\n20\n{y:.3f}\n30\n0.0\n")
+            for a, (tag, value) in enumerate(zip(BLOCK_ATTRIBUTES[block], values)):
+                parts.append(f"0\nATTRIB\n8\n{layer}\n10\n{x + 2.0:.3f}\n20\n{y - a * text_height * 1.5:.3f}\n"
+                             f"30\n0.0\n40\n{text_height}\n1\n{value}\n2\n{tag}\n70\n0\n")
+            parts.append(f"0\nSEQEND\n8\n{layer}\n")
+            count += 1
+
+        out.write("".join(parts))
+    out.write("0\nENDSEC\n")
+    return count
+
+
+def write_dxf(store, target, text_height=1.0, chunk=20000):
+    # Tulis `store` (PlacemarkStore.finish()) ke `target` (path atau file teks).
+    # Satu layer per folder KML; tiang/FAT/FDT jadi INSERT block beratribut,
+    # geometri lebih dari satu vertex (kabel) jadi POLYLINE. Koordinat dalam
+    # meter UTM. Mengembalikan (jumlah entity, EPSG).
+    if isinstance(target, str):
+        with open(target, "w", encoding="ascii", newline="\r\n") as out:
+            return write_dxf(store, out, text_height, chunk)
+
+    transformer, epsg = utm_transformer(store)
+    layers = [layer_name(folder) for folder in store.folders.values]
+    _header(target, _extents(store, transformer))
+    _tables(target, sorted(set(layers)))
+    _blocks(target, text_height)
+    count = _entities(target, store, transformer, layers, text_height, chunk)
+    target.write("0\nEOF\n")
+    return count, epsg
+
+
+def export_kmz_to_dxf(kmz_file, target, text_height=1.0):
+    return write_dxf(read_kmz(kmz_file), target, text_height)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export KMZ template EMR ke DXF (UTM, satu layer per folder)")
+    parser.add_argument("kmz")
+    parser.add_argument("output")
+    parser.add_argument("--text-height", type=float, default=1.0, help="tinggi teks atribut (meter)")
+    args = parser.parse_args(argv)
+
+    count, epsg = export_kmz_to_dxf(args.kmz, args.output, args.text_height)
+    print(f"{args.output}: {count} entity (EPSG:{epsg})")
+
+
+if __name__ == "__main__":
+    main()
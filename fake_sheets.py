@@ -0,0 +1,322 @@
+import json
+import random
+import re
+import sqlite3
+import threading
+import time
+from collections import defaultdict
+
+import requests
+from gspread.exceptions import APIError, WorksheetNotFound
+
+# Pengganti Google Sheets untuk tes & benchmark tanpa jaringan. Mendukung
+# bagian API gspread Worksheet yang dipakai modul append_*: row_values,
+# col_values, get_all_values, batch_get, append_rows, batch_update. delete_rows
+# untuk tes (meniru operator yang menghapus baris langsung di sheet).
+
+_A1 = re.compile(r"^(?:(?:'[^']*'|[^!]*)!)?([A-Z]*)(\d*)(?::([A-Z]*)(\d*))?$")
+
+
+def _col_index(letters):
+    n = 0
+    for ch in letters:
+        n = n * 26 + ord(ch) - 64
+    return n
+
+
+def _parse_range(a1):
+    m = _A1.match(a1.strip())
+    if not m:
+        raise ValueError(f"Range A1 tidak dikenal: {a1}")
+    c1, r1, c2, r2 = m.groups()
+    if c2 is None and r2 is None:
+        c2, r2 = c1, r1
+    return (_col_index(c1) if c1 else 1, int(r1) if r1 else 1,
+            _col_index(c2) if c2 else None, int(r2) if r2 else None)
+
+
+def _trim(row):
+    row = list(row)
+    while row and row[-1] == "":
+        row.pop()
+    return row
+
+
+def _cell(value):
+    # Nilai yang dikirim disimpan sebagai teks seperti FORMATTED_VALUE
+    if value is None:
+        return ""
+    return value if isinstance(value, str) else str(value)
+
+
+# Locale dengan koma sebagai pemisah desimal
+DECIMAL_COMMA_LOCALES = ("id_ID", "de_DE", "es_ES", "fr_FR", "it_IT", "nl_NL", "pt_BR")
+
+_NUMBER = re.compile(r"^-?(?:0|[1-9]\d*)(?:\.\d+)?$")
+
+
+def _render(value, decimal_comma, unformatted):
+    # Sel angka dibaca seperti Sheets: UNFORMATTED_VALUE -> int/float,
+    # FORMATTED_VALUE -> teks sesuai locale spreadsheet (id_ID: "0,5")
+    if not _NUMBER.match(value):
+        return value
+    if unformatted:
+        return float(value) if "." in value else int(value)
+    return value.replace(".", ",") if decimal_comma else value
+
+
+def api_error(status, message="fake error"):
+    response = requests.Response()
+    response.status_code = status
+    response._content = json.dumps({"error": {"code": status, "message": message, "status": "FAKE"}}).encode()
+    return APIError(response)
+
+
+class MemoryStore:
+    def __init__(self, rows=None):
+        self._rows = [list(r) for r in rows or []]
+
+    def rows(self):
+        return self._rows
+
+    def append(self, rows):
+        self._rows.extend(rows)
+
+    def set_row(self, row_number, row):
+        while len(self._rows) < row_number:
+            self._rows.append([])
+        self._rows[row_number - 1] = row
+
+    def delete(self, start, end):
+        del self._rows[start - 1:end]
+
+
+class SqliteStore:
+    def __init__(self, path, key, rows=None):
+        self.path = path
+        self.key = key
+        with self._db() as db:
+            db.execute("CREATE TABLE IF NOT EXISTS rows (sheet TEXT, rownum INTEGER, data TEXT, "
+                       "PRIMARY KEY (sheet, rownum))")
+        if rows:
+            self.append([list(r) for r in rows])
+
+    def _db(self):
+        return sqlite3.connect(self.path)
+
+    def rows(self):
+        with self._db() as db:
+            found = db.execute("SELECT rownum, data FROM rows WHERE sheet = ? ORDER BY rownum", (self.key,)).fetchall()
+        out = []
+        for rownum, data in found:
+            out += [[]] * (rownum - 1 - len(out))
+            out.append(json.loads(data))
+        return out
+
+    def append(self, rows):
+        with self._db() as db:
+            start = db.execute("SELECT COALESCE(MAX(rownum), 0) FROM rows WHERE sheet = ?", (self.key,)).fetchone()[0]
+            db.executemany("INSERT INTO rows VALUES (?, ?, ?)",
+                           [(self.key, start + k + 1, json.dumps(r)) for k, r in enumerate(rows)])
+
+    def set_row(self, row_number, row):
+        with self._db() as db:
+            db.execute("INSERT OR REPLACE INTO rows VALUES (?, ?, ?)", (self.key, row_number, json.dumps(row)))
+
+    def delete(self, start, end):
+        # Baris di bawahnya naik; lewat nomor negatif supaya primary key tidak bentrok
+        with self._db() as db:
+            db.execute("DELETE FROM rows WHERE sheet = ? AND rownum BETWEEN ? AND ?", (self.key, start, end))
+            db.execute("UPDATE rows SET rownum = -(rownum - ?) WHERE sheet = ? AND rownum > ?",
+                       (end - start + 1, self.key, end))
+            db.execute("UPDATE rows SET rownum = -rownum WHERE sheet = ? AND rownum < 0", (self.key,))
+
+
+class FakeWorksheet:
+    def __init__(self, title, rows=None, store=None, latency=0.0, error_rate=0.0, error_status=429, seed=0,
+                 locale="en_US"):
+        self.title = title
+        self.store = store or MemoryStore(rows)
+        # Locale spreadsheet: menentukan tampilan angka pada FORMATTED_VALUE
+        self.locale = locale
+        self.latency = latency
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.calls = []
+        self._failures = []
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    # === injeksi gangguan ===
+    def fail_next(self, status=429, times=1, method=None, applied=False):
+        # `times` panggilan berikutnya (opsional hanya untuk `method`) gagal.
+        # applied=True: perubahan tetap diterapkan, error baru dikirim sesudahnya
+        # (mis. 503 setelah append sebenarnya sudah masuk).
+        self._failures += [(method, status, applied)] * times
+
+    def _call(self, method, sent, fn):
+        start = time.perf_counter()
+        delay = self.latency() if callable(self.latency) else self.latency
+        if delay:
+            time.sleep(delay)
+        with self._lock:
+            failure = next((f for f in self._failures if f[0] in (None, method)), None)
+            if failure:
+                self._failures.remove(failure)
+            elif self.error_rate and self._random.random() < self.error_rate:
+                failure = (method, self.error_status, False)
+            if failure:
+                if failure[2]:
+                    fn()
+                self._record(method, sent, None, start, failure[1])
+                raise api_error(failure[1], f"{method} gagal (injeksi)")
+            result = fn()
+            self._record(method, sent, result, start, 200)
+        return result
+
+    def _record(self, method, sent, result, start, status):
+        self.calls.append({
+            "method": method,
+            "status": status,
+            "bytes_sent": len(json.dumps(sent, default=str)) if sent is not None else 0,
+            "bytes_received": len(json.dumps(result, default=str)) if result is not None else 0,
+            "seconds": time.perf_counter() - start,
+        })
+
+    def stats(self):
+        summary = defaultdict(lambda: {"calls": 0, "errors": 0, "bytes_sent": 0, "bytes_received": 0, "seconds": 0.0})
+        for call in self.calls:
+            s = summary[call["method"]]
+            s["calls"] += 1
+            s["errors"] += call["status"] != 200
+            s["bytes_sent"] += call["bytes_sent"]
+            s["bytes_received"] += call["bytes_received"]
+            s["seconds"] += call["seconds"]
+        return dict(summary)
+
+    # === metadata ===
+    @property
+    def row_count(self):
+        return max(1000, len(self.store.rows()))
+
+    @property
+    def col_count(self):
+        return max([26] + [len(r) for r in self.store.rows()])
+
+    # === baca ===
+    def _values(self, value_render_option="FORMATTED_VALUE"):
+        rows = [_trim(r) for r in self.store.rows()]
+        while rows and not rows[-1]:
+            rows.pop()
+        unformatted = value_render_option == "UNFORMATTED_VALUE"
+        decimal_comma = self.locale in DECIMAL_COMMA_LOCALES
+        if unformatted or decimal_comma:
+            rows = [[_render(v, decimal_comma, unformatted) for v in r] for r in rows]
+        return rows
+
+    def get_all_values(self, value_render_option="FORMATTED_VALUE", **kwargs):
+        def read():
+            rows = self._values(value_render_option)
+            width = max([len(r) for r in rows] + [0])
+            return [r + [""] * (width - len(r)) for r in rows]
+        return self._call("get_all_values", None, read)
+
+    def row_values(self, row, value_render_option="FORMATTED_VALUE", **kwargs):
+        def read():
+            rows = self._values(value_render_option)
+            return list(rows[row - 1]) if row <= len(rows) else []
+        return self._call("row_values", None, read)
+
+    def col_values(self, col, value_render_option="FORMATTED_VALUE", **kwargs):
+        def read():
+            values = [r[col - 1] if col <= len(r) else "" for r in self._values(value_render_option)]
+            return _trim(values)
+        return self._call("col_values", None, read)
+
+    def batch_get(self, ranges, value_render_option="FORMATTED_VALUE", **kwargs):
+        def read():
+            rows = self._values(value_render_option)
+            result = []
+            for a1 in ranges:
+                c1, r1, c2, r2 = _parse_range(a1)
+                block = [_trim(r[c1 - 1:c2]) for r in rows[r1 - 1:r2]]
+                while block and not block[-1]:
+                    block.pop()
+                result.append(block)
+            return result
+        return self._call("batch_get", list(ranges), read)
+
+    # === tulis ===
+    def append_rows(self, values, value_input_option="RAW", **kwargs):
+        values = [[_cell(v) for v in row] for row in values]
+
+        def write():
+            start = len(self.store.rows()) + 1
+            self.store.append(values)
+            return {"updates": {"updatedRange": f"{self.title}!A{start}", "updatedRows": len(values)}}
+        return self._call("append_rows", values, write)
+
+    def batch_update(self, data, **kwargs):
+        def write():
+            updated = 0
+            rows = self.store.rows()
+            for item in data:
+                c1, r1, _, _ = _parse_range(item["range"])
+                for k, new_values in enumerate(item["values"]):
+                    row_number = r1 + k
+                    row = list(rows[row_number - 1]) if row_number <= len(rows) else []
+                    row += [""] * (c1 - 1 + len(new_values) - len(row))
+                    row[c1 - 1:c1 - 1 + len(new_values)] = [_cell(v) for v in new_values]
+                    self.store.set_row(row_number, row)
+                    updated += 1
+            return {"totalUpdatedRows": updated}
+        return self._call("batch_update", data, write)
+
+    def delete_rows(self, start_index, end_index=None):
+        end_index = end_index or start_index
+        return self._call("delete_rows", [start_index, end_index],
+                          lambda: self.store.delete(start_index, end_index))
+
+
+class FakeSpreadsheet:
+    def __init__(self, client, key):
+        self.client = client
+        self.id = key
+
+    def worksheet(self, title):
+        return self.client.get_worksheet(self.id, title)
+
+
+class FakeClient:
+    # Pengganti gspread.Client. Dengan `path`, isi sheet disimpan di SQLite
+    # (bisa di-seed sekali lalu dipakai ulang antar proses).
+    def __init__(self, path=None, latency=0.0, error_rate=0.0, error_status=429, create=True, locale="en_US"):
+        self.path = path
+        self.locale = locale
+        self.latency = latency
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.create = create
+        self.worksheets = {}
+        self._lock = threading.Lock()
+
+    def seed(self, spreadsheet_id, title, rows):
+        return self.get_worksheet(spreadsheet_id, title, rows=rows)
+
+    def get_worksheet(self, spreadsheet_id, title, rows=None):
+        key = (spreadsheet_id, title)
+        with self._lock:
+            if key not in self.worksheets:
+                if not self.create and rows is None and self.path is None:
+                    raise WorksheetNotFound(title)
+                store = SqliteStore(self.path, f"{spreadsheet_id}/{title}", rows) if self.path else MemoryStore(rows)
+                self.worksheets[key] = FakeWorksheet(title, store=store, latency=self.latency,
+                                                     error_rate=self.error_rate, error_status=self.error_status,
+                                                     locale=self.locale)
+            return self.worksheets[key]
+
+    def open_by_key(self, key):
+        return FakeSpreadsheet(self, key)
+
+    def stats(self):
+        return {f"{sid}/{title}": ws.stats() for (sid, title), ws in self.worksheets.items()}
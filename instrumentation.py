@@ -0,0 +1,222 @@
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar, copy_context
+from datetime import datetime, timezone
+
+# Pencatatan waktu per tahap (parse, nearest pole, template, build, append)
+# beserta jumlah baris dan panggilan API Sheets. Satu Run per submit; tahap
+# dan panggilan API dicatat ke Run yang aktif di context saat itu, jadi aman
+# untuk beberapa sesi Streamlit sekaligus. Tanpa Run aktif semuanya no-op.
+#
+# Run juga bisa dibatalkan (run.cancel()): tahap berikutnya dan chunk append
+# berikutnya melempar Cancelled. Listener run.listeners dipanggil di awal dan
+# akhir tiap tahap (listener(stage, "start"/"end")), untuk progres di UI.
+#
+# Log JSON (satu baris per Run) dikirim ke logger "taradwg.timing" dan, bila
+# TARADWG_TIMING_LOG diisi path file, ditambahkan ke file tersebut.
+
+# Level & handler diatur entry point (dwg.py, cli.py), bukan di sini, supaya
+# handler yang dipasang deployment di root logger tetap menerima baris ini.
+logger = logging.getLogger("taradwg.timing")
+
+TIMING_LOG = os.environ.get("TARADWG_TIMING_LOG")
+
+# Method Worksheet yang memanggil API Sheets
+API_METHODS = frozenset({"get_all_values", "row_values", "col_values", "batch_get", "get",
+                         "append_rows", "batch_update", "update"})
+
+_run = ContextVar("taradwg_run", default=None)
+_stage = ContextVar("taradwg_stage", default=None)
+
+
+class Cancelled(Exception):
+    def __init__(self, name=None):
+        super().__init__(f"dibatalkan sebelum {name}" if name else "dibatalkan")
+
+
+class Stage:
+    def __init__(self, name, parent=None, rows=None, nbytes=None):
+        self.name = name
+        self.parent = parent
+        self.rows = rows
+        self.bytes = nbytes
+        self.seconds = 0.0
+        self.status = "ok"
+        self.api_calls = 0
+        self.api_errors = 0
+        self.api_seconds = 0.0
+        self.bytes_sent = 0
+        self.bytes_received = 0
+
+    def as_dict(self):
+        return {
+            "stage": self.name,
+            "parent": self.parent,
+            "status": self.status,
+            "seconds": round(self.seconds, 4),
+            "rows": self.rows,
+            "bytes": self.bytes,
+            "api_calls": self.api_calls,
+            "api_errors": self.api_errors,
+            "api_seconds": round(self.api_seconds, 4),
+            "bytes_sent": self.bytes_sent,
+            "bytes_received": self.bytes_received,
+        }
+
+
+class Run:
+    def __init__(self, name, cancelled=None):
+        self.name = name
+        self.id = uuid.uuid4().hex[:12]
+        self.started = datetime.now(timezone.utc)
+        self.seconds = 0.0
+        self.stages = []
+        # Panggilan API di luar tahap mana pun
+        self.unstaged = Stage("(lain-lain)")
+        self.cancelled = cancelled or threading.Event()
+        self.listeners = []
+        self._start = time.perf_counter()
+        self._lock = threading.Lock()
+
+    def cancel(self):
+        self.cancelled.set()
+
+    def check(self, name=None):
+        if self.cancelled.is_set():
+            raise Cancelled(name)
+
+    def notify(self, stage, event):
+        for listener in list(self.listeners):
+            listener(stage, event)
+
+    def add(self, stage):
+        with self._lock:
+            self.stages.append(stage)
+
+    def record_api(self, stage, seconds, sent, received, error):
+        stage = stage or self.unstaged
+        with self._lock:
+            stage.api_calls += 1
+            stage.api_errors += error
+            stage.api_seconds += seconds
+            stage.bytes_sent += sent
+            stage.bytes_received += received
+
+    def finish(self):
+        self.seconds = time.perf_counter() - self._start
+        return self
+
+    def rows(self):
+        stages = list(self.stages)
+        if self.unstaged.api_calls:
+            stages.append(self.unstaged)
+        return [s.as_dict() for s in stages]
+
+    def as_dict(self):
+        return {
+            "run_id": self.id,
+            "run": self.name,
+            "started": self.started.isoformat(),
+            "seconds": round(self.seconds, 4),
+            "stages": self.rows(),
+        }
+
+
+def start_run(name, cancelled=None):
+    # cancelled: threading.Event milik pemanggil (mis. job background) untuk membatalkan run ini
+    run = Run(name, cancelled)
+    _run.set(run)
+    _stage.set(None)
+    return run
+
+
+def current_run():
+    return _run.get()
+
+
+@contextmanager
+def stage(name, rows=None, nbytes=None):
+    # with stage("parse", nbytes=...) as s: ...; s.rows = n
+    run = _run.get()
+    if run is None:
+        yield Stage(name, rows=rows, nbytes=nbytes)
+        return
+
+    parent = _stage.get()
+    current = Stage(name, parent.name if parent else None, rows, nbytes)
+    token = _stage.set(current)
+    start = time.perf_counter()
+    try:
+        run.check(name)
+        run.notify(current, "start")
+        yield current
+    except Cancelled:
+        current.status = "cancelled"
+        raise
+    except BaseException:
+        current.status = "error"
+        raise
+    finally:
+        current.seconds = time.perf_counter() - start
+        _stage.reset(token)
+        run.add(current)
+        run.notify(current, "end")
+
+
+def checkpoint(name=None):
+    # Titik batal di dalam tahap yang panjang (mis. di antara chunk append)
+    run = _run.get()
+    if run is not None:
+        run.check(name)
+
+
+def submit(pool, fn, *args, **kwargs):
+    # pool.submit yang membawa Run & tahap aktif ke thread pekerja
+    return pool.submit(copy_context().run, fn, *args, **kwargs)
+
+
+def _size(value):
+    try:
+        return len(json.dumps(value, default=str))
+    except (TypeError, ValueError):
+        return 0
+
+
+class InstrumentedWorksheet:
+    # Proxy gspread Worksheet: panggilan API dicatat (waktu, byte kirim/terima)
+    # ke tahap yang sedang aktif. Atribut lain diteruskan apa adanya.
+    def __init__(self, worksheet):
+        self._worksheet = worksheet
+
+    def __getattr__(self, name):
+        attr = getattr(self._worksheet, name)
+        if name not in API_METHODS or not callable(attr):
+            return attr
+
+        def call(*args, **kwargs):
+            run = _run.get()
+            if run is None:
+                return attr(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                result = attr(*args, **kwargs)
+            except Exception:
+                run.record_api(_stage.get(), time.perf_counter() - start, _size(args), 0, True)
+                raise
+            run.record_api(_stage.get(), time.perf_counter() - start, _size(args), _size(result), False)
+            return result
+        return call
+
+
+def log_run(run, path=TIMING_LOG):
+    line = json.dumps(run.as_dict(), ensure_ascii=False)
+    logger.info(line)
+    if path:
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+    return line
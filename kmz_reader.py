@@ -0,0 +1,211 @@
+import io
+import os
+import zipfile
+import xml.etree.ElementTree as ET
+
+import numpy as np
+
+from placemark_store import PlacemarkStore, POLE_TYPE_CODES
+
+# Folder KMZ template EMR -> (jenis tiang, tinggi)
+POLE_FOLDERS = {
+    "NEW POLE 7-3": ("7m3inch", "7"),
+    "NEW POLE 7-4": ("7m4inch", "7"),
+    "NEW POLE 9-4": ("9m4inch", "9"),
+    "EXISTING POLE EMR 7-3": ("ext7m3inch", "7"),
+    "EXISTING POLE EMR 7-4": ("ext7m4inch", "7"),
+    "EXISTING POLE EMR 9-4": ("ext9m4inch", "9"),
+}
+
+# Folder yang dipakai oleh extract_points_from_kmz (FAT + tiang baru)
+POINT_FOLDERS = ("FAT", "NEW POLE 7-3", "NEW POLE 7-4", "NEW POLE 9-4")
+
+
+def _local(tag):
+    return tag.rsplit("}", 1)[-1]
+
+
+def _parse_coordinates(text):
+    # Semua vertex "lon,lat[,alt]" dari Point/LineString
+    coords = []
+    if not text or "," not in text:
+        return coords
+    for chunk in text.split():
+        parts = chunk.split(",")
+        try:
+            coords.append((float(parts[0]), float(parts[1])))
+        except (IndexError, ValueError):
+            continue
+    return coords
+
+
+def _read_placemark(elem, store, folder, path_key):
+    name = description = coords_text = None
+    for child in elem:
+        tag = _local(child.tag)
+        if tag == "name":
+            name = (child.text or "").strip()
+        elif tag == "description":
+            description = (child.text or "").strip()
+    for sub in elem.iter():
+        if _local(sub.tag) == "coordinates":
+            coords_text = sub.text
+            break
+    coords = _parse_coordinates(coords_text)
+    lon, lat = coords[0] if coords else (None, None)
+    pole_type = POLE_TYPE_CODES[POLE_FOLDERS[folder][0]] if folder in POLE_FOLDERS else -1
+    store.add(name, lon, lat, description or "", folder, path_key, pole_type, coords)
+
+
+def _stream_kml(kml_file, store):
+    # Satu kali jalan dengan iterparse; Placemark & Folder yang sudah selesai
+    # langsung dibuang dari pohon supaya memori tetap kecil. Setiap Placemark
+    # dikunjungi tepat sekali, path folder disimpan per level di `keys`.
+    stack = []
+    path = []
+    keys = []
+    in_placemark = 0
+
+    for event, elem in ET.iterparse(kml_file, events=("start", "end")):
+        tag = _local(elem.tag)
+        if event == "start":
+            if tag == "Folder":
+                path.append("UNKNOWN")
+                keys.append(f"{keys[-1]}/UNKNOWN" if keys else "UNKNOWN")
+            elif tag == "Placemark":
+                in_placemark += 1
+            stack.append(elem)
+            continue
+
+        stack.pop()
+        parent = stack[-1] if stack else None
+
+        if tag == "name":
+            if not in_placemark and parent is not None and _local(parent.tag) == "Folder":
+                path[-1] = (elem.text or "").strip().upper() or "UNKNOWN"
+                keys[-1] = f"{keys[-2]}/{path[-1]}" if len(keys) > 1 else path[-1]
+            continue
+
+        if tag == "Placemark":
+            in_placemark -= 1
+            if path and not in_placemark:
+                _read_placemark(elem, store, path[-1], keys[-1])
+        elif tag == "Folder":
+            store.add_folder(path.pop())
+            keys.pop()
+        else:
+            continue
+
+        elem.clear()
+        if parent is not None:
+            parent.remove(elem)
+
+
+def _open(kmz_file):
+    if isinstance(kmz_file, (bytes, bytearray, memoryview)):
+        return io.BytesIO(kmz_file)
+    return kmz_file
+
+
+def _members(z):
+    # Semua dokumen .kml di arsip, doc.kml (root) lebih dulu, sisanya sesuai
+    # urutan di zip. Aset lain (gambar overlay, ikon) tidak dibuka sama sekali.
+    names = [info.filename for info in z.infolist() if not info.is_dir() and info.filename.lower().endswith(".kml")]
+    if not names:
+        raise ValueError("❌ Tidak ditemukan file .kml dalam .kmz")
+    return sorted(names, key=lambda name: name.lower() != "doc.kml")
+
+
+def kml_members(kmz_file):
+    # Nama member .kml; hanya membaca daftar isi zip, tanpa dekompresi
+    with zipfile.ZipFile(_open(kmz_file), "r") as z:
+        return _members(z)
+
+
+def read_kmz(kmz_file):
+    # kmz_file: path, file object, atau isi upload (bytes/memoryview). Bytes
+    # dibuka lewat BytesIO tanpa salinan ke disk; semua member .kml di-stream
+    # berurutan ke satu PlacemarkStore (folder dengan path sama digabung).
+    store = PlacemarkStore()
+    with zipfile.ZipFile(_open(kmz_file), "r") as z:
+        for member in _members(z):
+            with z.open(member) as kml_file:
+                _stream_kml(kml_file, store)
+    return store.finish()
+
+
+def kml_parts(kmz_file):
+    # Argumen read_kml per dokumen KML, untuk di-parse paralel lalu digabung
+    # dengan merge_stores. Path cukup dikirim path-nya (dibuka ulang oleh
+    # pekerja); isi upload di memori -> hanya isi member .kml yang dikirim.
+    with zipfile.ZipFile(_open(kmz_file), "r") as z:
+        members = _members(z)
+        if isinstance(kmz_file, (str, os.PathLike)):
+            return [(kmz_file, member) for member in members]
+        return [(z.read(member), None) for member in members]
+
+
+def read_kml(source, member=None):
+    # Satu dokumen: isi .kml (bytes), atau member `member` dari KMZ `source`
+    store = PlacemarkStore()
+    if member is None:
+        _stream_kml(io.BytesIO(source), store)
+    else:
+        with zipfile.ZipFile(_open(source), "r") as z, z.open(member) as kml_file:
+            _stream_kml(kml_file, store)
+    return store.finish()
+
+
+def merge_stores(stores):
+    # Hasil read_kml per dokumen -> satu PlacemarkStore, urutan dokumen dipertahankan
+    if len(stores) == 1:
+        return stores[0]
+    merged = PlacemarkStore()
+    for store in stores:
+        merged.extend(store)
+    return merged.finish()
+
+
+def points_view(store):
+    fat_idx, pole_idx, pole_codes = [], [], []
+    has_point = (store.name_code >= 0) & ~np.isnan(store.lat)
+
+    # Kategori ditentukan sekali per path folder (folder terdekat yang dikenal),
+    # bukan per Placemark.
+    for path_key, idx in sorted(store.folder_index.items(), key=lambda kv: kv[1][0]):
+        base_folder = next((f for f in reversed(path_key.split("/")) if f in POINT_FOLDERS), None)
+        if base_folder is None:
+            continue
+
+        idx = idx[has_point[idx]]
+        if base_folder == "FAT":
+            fat_idx.append(idx)
+        else:
+            pole_idx.append(idx)
+            pole_codes.append(np.full(len(idx), POLE_TYPE_CODES[POLE_FOLDERS[base_folder][0]], dtype=np.int8))
+
+    def concat(parts, dtype):
+        return np.concatenate(parts) if parts else np.empty(0, dtype=dtype)
+
+    fat_points = store.view(concat(fat_idx, np.intp))
+    poles = store.view(concat(pole_idx, np.intp), concat(pole_codes, np.int8))
+    poles_subfeeder = poles.of_pole_types(["7m3inch"])
+    return fat_points, poles, poles_subfeeder
+
+
+def combined_view(store):
+    # Buang item kembar (nama, koordinat, folder) sama seperti seen_items lama.
+    keys = np.empty(len(store), dtype=[("name", np.intc), ("lon", np.int64), ("lat", np.int64), ("folder", np.intc)])
+    keys["name"] = np.where(store.name_code < 0, store.names.code(""), store.name_code)
+    keys["lon"] = store.lon.view(np.int64)
+    keys["lat"] = store.lat.view(np.int64)
+    keys["folder"] = store.folder_code
+    _, first = np.unique(keys, return_index=True)
+    kept = np.sort(first)
+
+    kept_folders = store.folder_code[kept]
+    folders = {name: store.view(kept[kept_folders == code]) for code, name in enumerate(store.folders.values)}
+
+    pole_idx = kept[store.pole_type[kept] >= 0]
+    poles = store.view(pole_idx, store.pole_type[pole_idx])
+    return folders, poles
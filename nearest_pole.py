@@ -0,0 +1,75 @@
+import numpy as np
+import shapely
+
+from instrumentation import stage
+
+EARTH_RADIUS_M = 6371008.8
+
+# Jenis tiang yang boleh jadi parent
+FAT_PARENT_TYPES = ["7m3inch"]
+FDT_PARENT_TYPES = ["7m4inch", "7m3inch", "ext7m3inch", "ext7m4inch", "ext9m4inch"]
+
+
+def point_columns(items):
+    # PlacemarkView punya kolom lat/lon langsung; list dict dibaca per baris.
+    if hasattr(items, "lat") and hasattr(items, "names"):
+        return np.asarray(items.lat, dtype=np.float64), np.asarray(items.lon, dtype=np.float64), items.names
+    items = list(items)
+    lat = np.array([np.nan if p["lat"] is None else float(p["lat"]) for p in items], dtype=np.float64)
+    lon = np.array([np.nan if p["lon"] is None else float(p["lon"]) for p in items], dtype=np.float64)
+    return lat, lon, [p["name"] for p in items]
+
+
+def project(lat, lon, lat0, lon0):
+    # Equirectangular lokal di sekitar (lat0, lon0), hasil dalam meter
+    x = np.radians(lon - lon0) * np.cos(np.radians(lat0)) * EARTH_RADIUS_M
+    y = np.radians(lat - lat0) * EARTH_RADIUS_M
+    return x, y
+
+
+def _filter_types(poles, pole_types):
+    if pole_types is None:
+        return poles
+    if hasattr(poles, "of_pole_types"):
+        return poles.of_pole_types(pole_types)
+    return [p for p in poles if p["folder"] in pole_types]
+
+
+class PoleIndex:
+    # Dibangun sekali per kategori tiang. Koordinat diproyeksikan ke meter
+    # (equirectangular lokal di sekitar titik tengah tiang) lalu dimasukkan
+    # ke STRtree, jadi jarak Euclidean di sini adalah jarak meter sebenarnya.
+    def __init__(self, poles, pole_types=None):
+        lat, lon, names = point_columns(_filter_types(poles, pole_types))
+        valid = ~(np.isnan(lat) | np.isnan(lon))
+        self.names = [n for n, ok in zip(names, valid) if ok]
+        lat, lon = lat[valid], lon[valid]
+
+        self.lat0 = float(lat.mean()) if len(lat) else 0.0
+        self.lon0 = float(lon.mean()) if len(lon) else 0.0
+        self.tree = shapely.STRtree(shapely.points(*self._project(lat, lon))) if len(lat) else None
+
+    def _project(self, lat, lon):
+        return project(lat, lon, self.lat0, self.lon0)
+
+    def nearest(self, points):
+        # Satu panggilan batch untuk semua titik: (nama tiang, jarak meter).
+        lat, lon, _ = point_columns(points)
+        names = [""] * len(lat)
+        distances = np.full(len(lat), np.nan)
+        valid = np.flatnonzero(~(np.isnan(lat) | np.isnan(lon)))
+        if self.tree is None or not len(valid):
+            return names, distances
+
+        query = shapely.points(*self._project(lat[valid], lon[valid]))
+        (src, dst), dist = self.tree.query_nearest(query, return_distance=True, all_matches=False)
+        for q, p, d in zip(valid[src], dst, dist):
+            names[q] = self.names[p]
+            distances[q] = d
+        return names, distances
+
+
+def nearest_pole_names(points, poles, pole_types=None):
+    with stage("nearest_pole", rows=len(points)):
+        names, _ = PoleIndex(poles, pole_types).nearest(points)
+    return names
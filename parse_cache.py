@@ -0,0 +1,285 @@
+import hashlib
+import multiprocessing
+import os
+import pickle
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from kmz_reader import kml_members, kml_parts, merge_stores, read_kml, read_kmz
+
+# Cache hasil parse KMZ, kuncinya SHA-256 isi file. Streamlit menjalankan
+# ulang script di setiap interaksi widget; upload yang sama tidak perlu
+# di-parse ulang. Di memori: LRU sebanyak MAX_ENTRIES. Opsional di disk
+# (TARADWG_PARSE_CACHE_DIR) sebagai pickle PlacemarkStore, dibatasi
+# TARADWG_PARSE_CACHE_MB; file yang paling lama tidak dipakai dihapus dulu.
+
+# Naikkan bila format PlacemarkStore / hasil parser berubah
+# (2: semua dokumen .kml dalam KMZ dibaca, bukan hanya yang pertama)
+PARSER_VERSION = 2
+
+MAX_ENTRIES = int(os.environ.get("TARADWG_PARSE_CACHE_ENTRIES", "8"))
+CACHE_DIR = os.environ.get("TARADWG_PARSE_CACHE_DIR")
+CACHE_MB = float(os.environ.get("TARADWG_PARSE_CACHE_MB", "512"))
+
+_CHUNK = 1 << 20
+
+
+def content_hash(source):
+    # source: path, bytes, atau file object (posisi dikembalikan ke awal)
+    digest = hashlib.sha256()
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        digest.update(source)
+    elif isinstance(source, (str, os.PathLike)):
+        with open(source, "rb") as f:
+            for chunk in iter(lambda: f.read(_CHUNK), b""):
+                digest.update(chunk)
+    else:
+        source.seek(0)
+        for chunk in iter(lambda: source.read(_CHUNK), b""):
+            digest.update(chunk)
+        source.seek(0)
+    return digest.hexdigest()
+
+
+# Process pool parse dipakai bersama semua submit selama proses hidup. Proses
+# pekerja dibuat lewat forkserver (spawn bila tidak tersedia), bukan fork:
+# fork dari server Streamlit yang multi-thread bisa mewarisi lock yang sedang
+# dipegang thread lain dan macet.
+_pool = None
+_pool_workers = 0
+_pool_lock = threading.Lock()
+
+
+def _start_method():
+    methods = multiprocessing.get_all_start_methods()
+    return "forkserver" if "forkserver" in methods else "spawn"
+
+
+def _get_pool(workers):
+    # Pool diperbesar (dibuat ulang) hanya bila butuh lebih banyak pekerja
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is None or workers > _pool_workers:
+            if _pool is not None:
+                _pool.shutdown(wait=False)
+            _pool = ProcessPoolExecutor(max_workers=workers,
+                                        mp_context=multiprocessing.get_context(_start_method()))
+            _pool_workers = workers
+        return _pool
+
+
+def _drop_pool(pool):
+    # Pekerja mati (mis. kehabisan memori): pool rusak, buat baru di submit berikutnya
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is pool:
+            _pool, _pool_workers = None, 0
+    pool.shutdown(wait=False)
+
+
+def _parse(source):
+    # Dijalankan di process pool; PlacemarkStore dikirim balik lewat pickle
+    try:
+        return read_kmz(source), None
+    except Exception as e:
+        return None, f"{e}"
+
+
+def _parse_part(source, member):
+    # Satu dokumen KML dari KMZ yang berisi beberapa .kml (process pool)
+    try:
+        return read_kml(source, member), None
+    except Exception as e:
+        return None, f"{e}"
+
+
+def _units(source):
+    # Jumlah unit kerja KMZ ini: satu per dokumen .kml (daftar isi zip saja)
+    try:
+        return len(kml_members(source))
+    except Exception:
+        # Rusak / bukan zip: tetap satu unit, error-nya dilaporkan oleh _parse
+        return 1
+
+
+class ParseCache:
+    def __init__(self, max_entries=MAX_ENTRIES, cache_dir=CACHE_DIR, max_disk_mb=CACHE_MB):
+        self.max_entries = max_entries
+        self.cache_dir = cache_dir
+        self.max_disk_bytes = int(max_disk_mb * 2 ** 20)
+        self.hits = self.disk_hits = self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.v{PARSER_VERSION}.pkl")
+
+    def get(self, key):
+        with self._lock:
+            store = self._entries.get(key)
+            if store is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return store
+
+        store = self._load(key) if self.cache_dir else None
+        if store is not None:
+            self.disk_hits += 1
+            self._remember(key, store)
+        return store
+
+    def put(self, key, store):
+        self._remember(key, store)
+        if self.cache_dir:
+            self._save(key, store)
+
+    def _remember(self, key, store):
+        with self._lock:
+            self._entries[key] = store
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _load(self, key):
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                store = pickle.load(f)
+            os.utime(path)
+            return store
+        except FileNotFoundError:
+            return None
+        except Exception:
+            # File rusak / versi lama: buang, parse ulang
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            return None
+
+    def _save(self, key, store):
+        # Cache disk hanya pelengkap; gagal tulis tidak menggagalkan parse
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            tmp = f"{self._path(key)}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp, "wb") as f:
+                pickle.dump(store, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, self._path(key))
+            self._trim_disk()
+        except OSError:
+            pass
+
+    def _trim_disk(self):
+        files = []
+        for name in os.listdir(self.cache_dir):
+            if name.endswith(".pkl"):
+                path = os.path.join(self.cache_dir, name)
+                try:
+                    info = os.stat(path)
+                except OSError:
+                    continue
+                files.append((info.st_mtime, info.st_size, path))
+        total = sum(size for _, size, _ in files)
+        for _, size, path in sorted(files):
+            if total <= self.max_disk_bytes:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
+
+    def read_kmz(self, source):
+        # Sama dengan kmz_reader.read_kmz, tapi memakai cache bila isi file
+        # sama; KMZ berisi beberapa dokumen .kml di-parse paralel
+        store, error = self.read_many([source])[0]
+        if store is None:
+            raise ValueError(error)
+        return store
+
+    def read_many(self, sources, workers=None):
+        # Banyak KMZ sekaligus (path / bytes). Yang sudah ada di cache langsung
+        # dipakai; sisanya di-parse paralel di process pool lalu masuk cache.
+        # Hasil: list (PlacemarkStore, None) atau (None, pesan error) sesuai urutan.
+        keys = [content_hash(source) for source in sources]
+        results = [None] * len(sources)
+        missing = {}
+        for i, key in enumerate(keys):
+            store = self.get(key)
+            if store is not None:
+                results[i] = (store, None)
+            else:
+                missing.setdefault(key, []).append(i)
+        if not missing:
+            return results
+
+        with self._lock:
+            self.misses += len(missing)
+        # KMZ dengan beberapa dokumen .kml dipecah per dokumen, jadi satu KMZ
+        # besar pun tersebar ke beberapa proses; hasilnya digabung per file
+        units = {key: _units(sources[idx[0]]) for key, idx in missing.items()}
+        parsed = {}
+        workers = max(1, min(workers or os.cpu_count() or 1, sum(units.values())))
+        if workers == 1:
+            for key, idx in missing.items():
+                parsed[key] = _parse(sources[idx[0]])
+        else:
+            pool = _get_pool(workers)
+            try:
+                futures = {}
+                for key, idx in missing.items():
+                    if units[key] == 1:
+                        futures[key] = [pool.submit(_parse, sources[idx[0]])]
+                        continue
+                    futures[key] = [pool.submit(_parse_part, *part) for part in kml_parts(sources[idx[0]])]
+                for key, parts in futures.items():
+                    done = [future.result() for future in parts]
+                    errors = [error for _, error in done if error is not None]
+                    parsed[key] = (None, errors[0]) if errors else (merge_stores([store for store, _ in done]), None)
+            except BrokenProcessPool:
+                _drop_pool(pool)
+                raise
+
+        for key, idx in missing.items():
+            store, error = parsed[key]
+            if store is not None:
+                self.put(key, store)
+            for i in idx:
+                results[i] = (store, error)
+        return results
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+# Satu cache per proses (dipakai bersama semua sesi Streamlit)
+default_cache = ParseCache()
+
+
+def cached_read_kmz(source):
+    return default_cache.read_kmz(source)
+
+
+def cached_read_many(sources, workers=None):
+    return default_cache.read_many(sources, workers)
+
+
+def read_groups(groups, workers=None):
+    # groups: beberapa daftar (source, kmz_name), mis. [cluster, subfeeder].
+    # Semua file di-parse dalam satu pool. Hasil: per grup daftar
+    # (PlacemarkStore, kmz_name) yang berhasil, dan daftar (kmz_name, error).
+    results = iter(cached_read_many([source for group in groups for source, _ in group], workers))
+    parsed, errors = [], []
+    for group in groups:
+        stores = []
+        for _, name in group:
+            store, error = next(results)
+            if error is not None:
+                errors.append((name, error))
+            else:
+                stores.append((store, name))
+        parsed.append(stores)
+    return parsed, errors
@@ -0,0 +1,276 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import append_fat_to_sheet
+import append_fdt_to_sheet
+import append_poles_to_main_sheet
+import append_cable_pekanbaru
+import append_subfeeder_cable
+from cable_join import join_cables, unconnected_message
+from cable_length import route_lengths, mismatch_message
+from dedup_index import DedupIndex, row_key
+from instrumentation import stage, submit
+from kmz_reader import points_view, combined_view
+from revision_index import RevisionIndex, diff
+from sheet_template import SheetTemplate
+from sheet_writer import READ_LIMITER, CHUNK_SIZE, WriteError, append_rows_chunked, call_with_backoff, update_rows
+from sheets_client import get_client, run_on_sheet
+
+SPREADSHEET_ID_3 = "1EnteHGDnRhwthlCO9B12zvHUuv3wtq5L2AKlV11qAOU"
+SHEET_NAME_3 = "FDT Pekanbaru"
+
+SPREADSHEET_ID_4 = "1D_OMm46yr-e80s3sCyvbSSsf8wrUCwpwiYsVBKPgszw"
+SHEET_NAME_4 = "Cable Pekanbaru"
+
+SPREADSHEET_ID_5 = "1paa8sT3nTZh_xxwHeKV8pwVIWacq7lC8U9A8BlX6LUw"
+SHEET_NAME_5 = "Sheet1"
+
+SPREADSHEET_ID = "1yXBIuX2LjUWxbpnNqf6A9YimtG7d77V_AHLidhWKIS8"
+SPREADSHEET_ID_2 = "1WI0Gb8ul5GPUND4ADvhFgH4GSlgwq1_4rRgfOnPz-yc"
+SHEET_NAME = "Pole Pekanbaru"
+SHEET_NAME_2 = "FAT Pekanbaru"
+
+MAX_WORKERS = 5
+
+
+class SheetJob:
+    # Semua batch baris untuk satu sheet tujuan. Batch ditulis berurutan
+    # sesuai urutan add(), jadi urutan di dalam satu sheet tetap terjaga.
+    # schema (RowSchema sheet ini) menentukan kolom yang dibandingkan antar revisi KMZ.
+    def __init__(self, label, spreadsheet_id, sheet_name, probe_col, value_input_option="RAW",
+                 chunk_size=CHUNK_SIZE, key_columns=None, schema=None):
+        self.label = label
+        self.spreadsheet_id = spreadsheet_id
+        self.sheet_name = sheet_name
+        self.probe_col = probe_col
+        self.value_input_option = value_input_option
+        self.chunk_size = chunk_size
+        self.key_columns = key_columns
+        self.schema = schema
+        self.skipped = 0
+        # Header sheet saat prepare(), dipakai sink dry-run sebagai nama kolom
+        self.headers = []
+        self.builders = []
+        # Hasil banding revisi: {nomor baris: baris baru} yang di-update di tempat,
+        # dan (kmz_name, nama, nomor baris/None) placemark yang hilang dari revisi baru
+        self.updates = {}
+        # Kolom data (per baris) yang ditulis ulang saat update; None = seluruh baris
+        self.update_columns = None
+        self.removed = []
+        self._revisions = []
+        self._index = None
+        # (fungsi st, isi) yang ditampilkan setelah sheet ini berhasil ditulis
+        self.messages = []
+
+    @property
+    def sheet_key(self):
+        return f"{self.spreadsheet_id}/{self.sheet_name}"
+
+    def add(self, build, *args, revision=None):
+        # build(template, *args) -> list baris. revision = kmz_name: baris
+        # dibandingkan dengan revisi terakhir KMZ itu yang berhasil dikirim.
+        self.builders.append((build, args, revision))
+
+    def __bool__(self):
+        return bool(self.builders)
+
+    def prepare(self):
+        def work(worksheet):
+            with stage(f"{self.label}: template"):
+                template = call_with_backoff(SheetTemplate, worksheet, probe_col=self.probe_col,
+                                             limiter=READ_LIMITER)
+            self.headers = template.headers
+            batches = []
+            for build, args, revision in self.builders:
+                with stage(f"{self.label}: {build.__name__}") as s:
+                    batches.append((build(template, *args), revision))
+                    s.rows = len(batches[-1][0])
+            if self.key_columns is None:
+                return [rows for rows, _ in batches]
+
+            # Lewati baris yang sudah pernah dikirim (submit ganda / upload ulang)
+            with stage(f"{self.label}: dedup", rows=sum(len(rows) for rows, _ in batches)):
+                index = DedupIndex(self.sheet_key, self.key_columns)
+                index.sync(worksheet, template.last_row)
+                self._index = index
+                filtered = []
+                for rows, revision in batches:
+                    if revision is not None:
+                        rows = self._delta(template, rows, revision)
+                    rows, skipped = index.filter(rows)
+                    self.skipped += skipped
+                    filtered.append(rows)
+            return filtered
+        return run_on_sheet(self.spreadsheet_id, self.sheet_name, work)
+
+    def _delta(self, template, rows, revision):
+        # Banding dengan revisi sebelumnya: yang berubah masuk self.updates
+        # (nomor baris dari index dedup), yang sama dilewati bila masih ada di
+        # sheet, sisanya di-append.
+        with stage(f"{self.label}: revisi {revision}", rows=len(rows)):
+            columns = self.schema.data_columns(template) if self.schema is not None else None
+            self.update_columns = columns
+            previous = RevisionIndex(self.sheet_key).load(revision)
+            delta = diff(previous, rows, self.key_columns[0], columns)
+            added = delta.added
+            # Scope dedup revisi ini (mis. RFS untuk kabel), untuk mencari nomor baris
+            scopes = {row_key(row, self.key_columns)[3] for row in rows}
+            scope = scopes.pop() if len(scopes) == 1 else None
+            for row in delta.unchanged:
+                if row_key(row, self.key_columns) in self._index.keys:
+                    self.skipped += 1
+                else:
+                    # Baris sudah dihapus manual dari sheet: kirim ulang
+                    added.append(row)
+            for name, row in delta.changed:
+                number = self._index.row_number(name, row_key(row, self.key_columns)[3])
+                if number is None:
+                    # Baris lama sudah dihapus dari sheet: kirim sebagai baris baru
+                    added.append(row)
+                else:
+                    self.updates[number] = row
+            self.removed += [(revision, name, self._index.row_number(name, scope)) for name in delta.removed]
+            self._revisions.append((revision, delta.fingerprints))
+        return added
+
+    def write(self, batches):
+        # Semua batch sheet ini (mis. tiang cluster + subfeeder) digabung
+        # berurutan jadi satu rangkaian append, dipotong per chunk_size.
+        # Kolom data baris yang berubah antar revisi ditimpa di tempat dengan satu batch_update.
+        rows = [row for batch in batches for row in batch]
+        with stage(f"{self.label}: append_rows", rows=len(rows)):
+            written = run_on_sheet(self.spreadsheet_id, self.sheet_name, append_rows_chunked,
+                                   rows, self.value_input_option, self.chunk_size, self.probe_col)
+        if self.updates:
+            with stage(f"{self.label}: batch_update", rows=len(self.updates)):
+                try:
+                    run_on_sheet(self.spreadsheet_id, self.sheet_name, update_rows,
+                                 self.updates, self.value_input_option, self.update_columns)
+                except WriteError as e:
+                    raise WriteError(written, len(rows) + len(self.updates), e.cause) from e
+                self._index.update(self.updates)
+
+        # Revisi baru dicatat hanya setelah semua tulis berhasil
+        revisions = RevisionIndex(self.sheet_key)
+        for revision, fingerprints in self._revisions:
+            revisions.save(revision, fingerprints)
+        return written
+
+
+def removed_message(job):
+    # Placemark yang hilang dari revisi KMZ; baris di sheet tidak dihapus otomatis
+    items = ", ".join(f"{name} (baris {row})" if row else name for _, name, row in job.removed)
+    return f"⚠️ {len(job.removed)} {job.label} tidak ada lagi di revisi KMZ terbaru, hapus manual bila perlu: {items}"
+
+
+def _track(future, progress, label, step):
+    if progress is not None:
+        future.add_done_callback(lambda f: progress(label, step, f.exception()))
+    return future
+
+
+def dispatch(jobs, max_workers=MAX_WORKERS, sink=None, progress=None):
+    # Tahap 1: baca template & bangun semua baris untuk tiap sheet (paralel).
+    # Tahap 2: kirim append_rows tiap sheet (paralel). Error dicatat per sheet,
+    # sheet lain tetap jalan. Hasil: {label: (jumlah baris, exception/None)}.
+    # sink(job, batches) -> jumlah baris menggantikan tahap tulis (dry-run).
+    # progress(label, "prepare"/"write", exception/None) dipanggil begitu tiap langkah sheet selesai.
+    jobs = [job for job in jobs if job]
+    results = {}
+    if not jobs:
+        return results
+
+    get_client()
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(jobs)))) as pool:
+        prepared = {job.label: _track(submit(pool, job.prepare), progress, job.label, "prepare") for job in jobs}
+        batches = {}
+        for job in jobs:
+            try:
+                batches[job.label] = prepared[job.label].result()
+            except Exception as e:
+                results[job.label] = (0, e)
+
+        write = sink or (lambda job, rows: job.write(rows))
+        written = {job.label: _track(submit(pool, write, job, batches[job.label]), progress, job.label, "write")
+                   for job in jobs if job.label in batches}
+        for label, future in written.items():
+            try:
+                results[label] = (future.result(), None)
+            except WriteError as e:
+                results[label] = (e.written, e)
+            except Exception as e:
+                results[label] = (0, e)
+
+    return results
+
+
+def build_jobs(clusters, subfeeders, district, subdistrict, vendor):
+    # clusters / subfeeders: daftar (PlacemarkStore, kmz_name). Baris semua KMZ
+    # digabung per sheet tujuan, jadi tiap sheet tetap satu rangkaian append.
+    # Hasil: daftar SheetJob (satu per sheet tujuan) dan pesan untuk UI.
+    pole_job = SheetJob("Pole", SPREADSHEET_ID, SHEET_NAME, append_poles_to_main_sheet.PROBE_COL,
+                        key_columns=append_poles_to_main_sheet.KEY_COLUMNS,
+                        schema=append_poles_to_main_sheet.POLE_SCHEMA)
+    fat_job = SheetJob("FAT", SPREADSHEET_ID_2, SHEET_NAME_2, append_fat_to_sheet.PROBE_COL,
+                       key_columns=append_fat_to_sheet.KEY_COLUMNS, schema=append_fat_to_sheet.FAT_SCHEMA)
+    fdt_job = SheetJob("FDT", SPREADSHEET_ID_3, SHEET_NAME_3, append_fdt_to_sheet.PROBE_COL, "USER_ENTERED",
+                       key_columns=append_fdt_to_sheet.KEY_COLUMNS, schema=append_fdt_to_sheet.FDT_SCHEMA)
+    cable_job = SheetJob("Kabel distribusi", SPREADSHEET_ID_4, SHEET_NAME_4, append_cable_pekanbaru.PROBE_COL,
+                         "USER_ENTERED", key_columns=append_cable_pekanbaru.KEY_COLUMNS,
+                         schema=append_cable_pekanbaru.CABLE_SCHEMA)
+    subfeeder_job = SheetJob("Kabel SubFeeder", SPREADSHEET_ID_5, SHEET_NAME_5, append_subfeeder_cable.PROBE_COL,
+                             "USER_ENTERED", key_columns=append_subfeeder_cable.KEY_COLUMNS,
+                             schema=append_subfeeder_cable.SUBFEEDER_CABLE_SCHEMA)
+    notes = []
+
+    # === CLUSTER (POLE 7m3 + FAT + FDT + kabel distribusi) ===
+    for store, kmz_name in clusters:
+        fat_points, poles_cluster, poles_subfeeder = points_view(store)
+        if poles_cluster:
+            pole_job.add(append_poles_to_main_sheet.build_pole_rows, poles_cluster, district, subdistrict, vendor,
+                         revision=kmz_name)
+            pole_job.messages.append(("info", append_poles_to_main_sheet.pole_summary(poles_cluster, kmz_name)))
+        if fat_points:
+            fat_job.add(append_fat_to_sheet.build_fat_rows, fat_points, poles_subfeeder,
+                        district, subdistrict, vendor, revision=kmz_name)
+            fat_job.messages.append(("success", f"✅ {len(fat_points)} FAT ({kmz_name})"))
+        else:
+            notes.append(("warning", f"⚠️ Tidak ditemukan folder FAT dalam file KMZ {kmz_name}."))
+
+        folders, poles = combined_view(store)
+        if 'FDT' in folders:
+            fdt_job.add(append_fdt_to_sheet.build_fdt_rows, folders['FDT'], poles,
+                        district, subdistrict, vendor, kmz_name, revision=kmz_name)
+        if 'DISTRIBUTION CABLE' in folders:
+            cables = folders['DISTRIBUTION CABLE']
+            lengths, mismatches = route_lengths(cables)
+            if mismatches:
+                notes.append(("warning", f"{kmz_name}: {mismatch_message(mismatches)}"))
+            links = join_cables(cables, folders.get('FDT'), folders.get('FAT'), poles)
+            if links.unconnected:
+                notes.append(("warning", f"{kmz_name}: {unconnected_message(links)}"))
+            cable_job.add(append_cable_pekanbaru.build_cable_pekanbaru_rows, cables, lengths,
+                          district, subdistrict, vendor, kmz_name, links, revision=kmz_name)
+            cable_job.messages.append(("write", [item['name'] for item in cables if item.get('name')]))
+
+    # === SUBFEEDER (POLE + kabel subfeeder) ===
+    for store, kmz_name in subfeeders:
+        _, poles_subonly, _ = points_view(store)
+        if poles_subonly:
+            pole_job.add(append_poles_to_main_sheet.build_pole_rows, poles_subonly, district, subdistrict, vendor,
+                         revision=kmz_name)
+            pole_job.messages.append(("info", append_poles_to_main_sheet.pole_summary(poles_subonly, kmz_name)))
+
+        folders, poles = combined_view(store)
+        if 'CABLE' in folders:
+            cables = folders['CABLE']
+            lengths, mismatches = route_lengths(cables)
+            if mismatches:
+                notes.append(("warning", f"{kmz_name}: {mismatch_message(mismatches)}"))
+            links = join_cables(cables, folders.get('FDT'), folders.get('FAT'), poles)
+            if links.unconnected:
+                notes.append(("warning", f"{kmz_name}: {unconnected_message(links)}"))
+            subfeeder_job.add(append_subfeeder_cable.build_subfeeder_cable_rows, cables, lengths,
+                              district, subdistrict, vendor, kmz_name, links, revision=kmz_name)
+            subfeeder_job.messages.append(("write", [item['name'] for item in cables if item.get('name')]))
+
+    return [pole_job, fat_job, fdt_job, cable_job, subfeeder_job], notes
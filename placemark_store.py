@@ -0,0 +1,256 @@
+from array import array
+
+import numpy as np
+
+# Kode jenis tiang -> (folder/poletype di sheet, tinggi)
+POLE_TYPES = [
+    ("7m3inch", "7"),
+    ("7m4inch", "7"),
+    ("9m4inch", "9"),
+    ("ext7m3inch", "7"),
+    ("ext7m4inch", "7"),
+    ("ext9m4inch", "9"),
+]
+POLE_TYPE_CODES = {pole_type: code for code, (pole_type, _) in enumerate(POLE_TYPES)}
+
+
+class StringTable:
+    # String disimpan sekali, kolom hanya menyimpan kode integer.
+    def __init__(self):
+        self.values = []
+        self._codes = {}
+
+    def intern(self, value):
+        code = self._codes.get(value)
+        if code is None:
+            code = self._codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+    def code(self, value):
+        return self._codes.get(value, -1)
+
+    def __len__(self):
+        return len(self.values)
+
+
+class PlacemarkStore:
+    def __init__(self):
+        self.names = StringTable()
+        self.descriptions = StringTable()
+        self.folders = StringTable()
+        self.paths = StringTable()
+        self.folder_index = {}
+
+        self._lon = array("d")
+        self._lat = array("d")
+        self._name = array("i")
+        self._description = array("i")
+        self._folder = array("i")
+        self._path = array("i")
+        self._pole_type = array("b")
+        # Semua vertex geometri (ragged): baris i memakai vertex
+        # coord_offset[i]:coord_offset[i + 1]
+        self._coord_lon = array("d")
+        self._coord_lat = array("d")
+        self._coord_offset = array("q", [0])
+
+        self.lon = self.lat = None
+        self.name_code = self.description_code = None
+        self.folder_code = self.path_code = self.pole_type = None
+        self.coord_lon = self.coord_lat = self.coord_offset = None
+
+    def add(self, name, lon, lat, description, folder, path, pole_type=-1, coords=()):
+        i = len(self._lon)
+        for c_lon, c_lat in coords:
+            self._coord_lon.append(c_lon)
+            self._coord_lat.append(c_lat)
+        self._coord_offset.append(len(self._coord_lon))
+        self._lon.append(np.nan if lon is None else lon)
+        self._lat.append(np.nan if lat is None else lat)
+        self._name.append(-1 if name is None else self.names.intern(name))
+        self._description.append(self.descriptions.intern(description))
+        self._folder.append(self.folders.intern(folder))
+        self._path.append(self.paths.intern(path))
+        self._pole_type.append(pole_type)
+        self.folder_index.setdefault(path, []).append(i)
+
+    def add_folder(self, folder):
+        self.folders.intern(folder)
+
+    def extend(self, other):
+        # Tambahkan semua placemark `other` (mis. dokumen KML lain dari KMZ
+        # yang sama) di belakang. Kode string dipetakan ke tabel store ini,
+        # folder dengan path yang sama digabung. Store ini belum finish().
+        base = len(self._lon)
+        for table, values, codes, column in ((self.names, other.names, other._name, self._name),
+                                             (self.descriptions, other.descriptions, other._description,
+                                              self._description),
+                                             (self.folders, other.folders, other._folder, self._folder),
+                                             (self.paths, other.paths, other._path, self._path)):
+            mapping = np.array([table.intern(v) for v in values.values] + [-1], dtype=np.intc)
+            # Kode -1 (nama kosong) tetap -1 lewat elemen terakhir mapping
+            column.frombytes(mapping[np.frombuffer(codes, dtype=np.intc)].tobytes())
+        self._lon.extend(other._lon)
+        self._lat.extend(other._lat)
+        self._pole_type.extend(other._pole_type)
+        offset = np.frombuffer(other._coord_offset, dtype=np.int64)[1:] + len(self._coord_lon)
+        self._coord_lon.extend(other._coord_lon)
+        self._coord_lat.extend(other._coord_lat)
+        self._coord_offset.frombytes(offset.tobytes())
+        for path, idx in other.folder_index.items():
+            self.folder_index.setdefault(path, []).extend((np.asarray(idx) + base).tolist())
+        return self
+
+    def finish(self):
+        self.lon = np.frombuffer(self._lon, dtype=np.float64)
+        self.lat = np.frombuffer(self._lat, dtype=np.float64)
+        self.name_code = np.frombuffer(self._name, dtype=np.intc)
+        self.description_code = np.frombuffer(self._description, dtype=np.intc)
+        self.folder_code = np.frombuffer(self._folder, dtype=np.intc)
+        self.path_code = np.frombuffer(self._path, dtype=np.intc)
+        self.pole_type = np.frombuffer(self._pole_type, dtype=np.int8)
+        self.coord_lon = np.frombuffer(self._coord_lon, dtype=np.float64)
+        self.coord_lat = np.frombuffer(self._coord_lat, dtype=np.float64)
+        self.coord_offset = np.frombuffer(self._coord_offset, dtype=np.int64)
+        self.folder_index = {path: np.asarray(idx, dtype=np.intp) for path, idx in self.folder_index.items()}
+        return self
+
+    def __getstate__(self):
+        # Untuk ProcessPoolExecutor: kirim buffer array saja, kolom numpy
+        # (view dari buffer yang sama) dibuat ulang oleh finish() di penerima.
+        state = self.__dict__.copy()
+        state["finished"] = self.lon is not None
+        for key in ("lon", "lat", "name_code", "description_code", "folder_code", "path_code", "pole_type",
+                    "coord_lon", "coord_lat", "coord_offset"):
+            state[key] = None
+        return state
+
+    def __setstate__(self, state):
+        finished = state.pop("finished")
+        self.__dict__.update(state)
+        if finished:
+            self.finish()
+
+    def __len__(self):
+        return len(self._lon)
+
+    def view(self, index=None, pole_types=None):
+        if index is None:
+            index = np.arange(len(self), dtype=np.intp)
+        return PlacemarkView(self, index, pole_types)
+
+
+class PlacemarkView:
+    # Subset baris dari PlacemarkStore. Untuk view tiang, `pole_types` berisi
+    # kode POLE_TYPES per baris dan item['folder'] mengembalikan jenis tiang.
+    def __init__(self, store, index, pole_types=None):
+        self.store = store
+        self.index = np.asarray(index, dtype=np.intp)
+        self.pole_types = None if pole_types is None else np.asarray(pole_types, dtype=np.int8)
+
+    def __len__(self):
+        return len(self.index)
+
+    def __bool__(self):
+        return len(self.index) > 0
+
+    def __iter__(self):
+        for j in range(len(self.index)):
+            yield PlacemarkRow(self, j)
+
+    def __getitem__(self, j):
+        return PlacemarkRow(self, j)
+
+    @property
+    def lat(self):
+        return self.store.lat[self.index]
+
+    @property
+    def lon(self):
+        return self.store.lon[self.index]
+
+    @property
+    def names(self):
+        values = self.store.names.values
+        return [values[c] if c >= 0 else "" for c in self.store.name_code[self.index]]
+
+    def column(self, key):
+        # Satu kolom untuk semua baris view (sama dengan [row[key] for row in view])
+        store = self.store
+        if key == "name":
+            return self.names
+        if key in ("lat", "lon"):
+            values = (self.lat if key == "lat" else self.lon).tolist()
+            return [None if v != v else v for v in values]
+        if key == "description":
+            texts = store.descriptions.values
+            return [texts[c] for c in store.description_code[self.index].tolist()]
+        if key in ("path", "full_path"):
+            texts = store.paths.values
+            return [texts[c] for c in store.path_code[self.index].tolist()]
+        if key in ("folder", "height") and self.pole_types is not None:
+            k = 0 if key == "folder" else 1
+            return [POLE_TYPES[c][k] for c in self.pole_types.tolist()]
+        if key == "folder":
+            texts = store.folders.values
+            return [texts[c] for c in store.folder_code[self.index].tolist()]
+        return [row[key] for row in self]
+
+    def coordinate_ranges(self):
+        return self.store.coord_offset[self.index], self.store.coord_offset[self.index + 1]
+
+    def select(self, mask):
+        pole_types = None if self.pole_types is None else self.pole_types[mask]
+        return PlacemarkView(self.store, self.index[mask], pole_types)
+
+    def of_pole_types(self, pole_types):
+        codes = [POLE_TYPE_CODES[t] for t in pole_types]
+        return self.select(np.isin(self.pole_types, codes))
+
+
+class PlacemarkRow:
+    __slots__ = ("view", "j")
+
+    def __init__(self, view, j):
+        self.view = view
+        self.j = j
+
+    def __getitem__(self, key):
+        store = self.view.store
+        i = self.view.index[self.j]
+        if key == "name":
+            code = store.name_code[i]
+            return store.names.values[code] if code >= 0 else ""
+        if key in ("lat", "lon"):
+            value = float(store.lat[i] if key == "lat" else store.lon[i])
+            return None if value != value else value
+        if key == "description":
+            return store.descriptions.values[store.description_code[i]]
+        if key in ("path", "full_path"):
+            return store.paths.values[store.path_code[i]]
+        if key == "folder":
+            if self.view.pole_types is not None:
+                return POLE_TYPES[self.view.pole_types[self.j]][0]
+            return store.folders.values[store.folder_code[i]]
+        if key == "height" and self.view.pole_types is not None:
+            return POLE_TYPES[self.view.pole_types[self.j]][1]
+        if key == "coordinates":
+            start, end = store.coord_offset[i], store.coord_offset[i + 1]
+            return list(zip(store.coord_lon[start:end].tolist(), store.coord_lat[start:end].tolist()))
+        raise KeyError(key)
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def keys(self):
+        keys = ["name", "lat", "lon", "description", "folder", "path", "full_path", "coordinates"]
+        if self.view.pole_types is not None:
+            keys.append("height")
+        return keys
+
+    def __contains__(self, key):
+        return key in self.keys()
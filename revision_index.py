@@ -0,0 +1,87 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+from collections import Counter
+
+from dedup_index import CACHE_PATH
+
+# Revisi KMZ terakhir yang berhasil dikirim, per (sheet, kmz_name): sidik tiap
+# placemark = hash kolom data barisnya (nama, koordinat, panjang, parent, ...).
+# Revisi berikutnya dengan kmz_name yang sama dibandingkan per nama placemark:
+# yang baru di-append, yang berubah di-update di tempat, yang hilang dilaporkan.
+
+_lock = threading.Lock()
+
+
+def fingerprint(row, columns=None):
+    values = row if columns is None else [row[i] if i < len(row) else "" for i in columns]
+    return hashlib.sha1(json.dumps(values, default=str).encode("utf-8")).hexdigest()
+
+
+class Delta:
+    def __init__(self):
+        self.added = []      # baris baru, lewat jalur append biasa
+        self.changed = []    # (nama, baris) yang isinya berubah
+        self.removed = []    # nama di revisi sebelumnya yang tidak ada lagi
+        self.unchanged = []  # baris yang sama persis dengan revisi sebelumnya
+        self.fingerprints = {}
+
+
+def diff(previous, rows, name_idx, columns=None):
+    # previous: {nama: sidik} revisi sebelumnya ({} kalau belum pernah dikirim)
+    delta = Delta()
+    names = [str(row[name_idx]).strip() if name_idx < len(row) else "" for row in rows]
+    counts = Counter(names)
+    for name, row in zip(names, rows):
+        if not name or counts[name] > 1:
+            # Tanpa nama / nama kembar tidak bisa dicocokkan antar revisi
+            delta.added.append(row)
+            continue
+        current = fingerprint(row, columns)
+        delta.fingerprints[name] = current
+        old = previous.get(name)
+        if old is None:
+            delta.added.append(row)
+        elif old != current:
+            delta.changed.append((name, row))
+        else:
+            delta.unchanged.append(row)
+    delta.removed = [name for name in previous if name not in counts]
+    return delta
+
+
+def _connect(path):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    db = sqlite3.connect(path)
+    db.execute("CREATE TABLE IF NOT EXISTS revisions (sheet TEXT, kmz TEXT, name TEXT, fingerprint TEXT)")
+    db.execute("CREATE INDEX IF NOT EXISTS revisions_kmz ON revisions (sheet, kmz)")
+    return db
+
+
+class RevisionIndex:
+    def __init__(self, sheet_key, path=CACHE_PATH):
+        self.sheet_key = sheet_key
+        self.path = path
+
+    def load(self, kmz_name):
+        with _lock:
+            db = _connect(self.path)
+            try:
+                return dict(db.execute("SELECT name, fingerprint FROM revisions WHERE sheet = ? AND kmz = ?",
+                                       (self.sheet_key, kmz_name)))
+            finally:
+                db.close()
+
+    def save(self, kmz_name, fingerprints):
+        # Ganti seluruh revisi kmz_name; dipanggil setelah tulis ke sheet berhasil
+        with _lock:
+            db = _connect(self.path)
+            try:
+                db.execute("DELETE FROM revisions WHERE sheet = ? AND kmz = ?", (self.sheet_key, kmz_name))
+                db.executemany("INSERT INTO revisions VALUES (?, ?, ?, ?)",
+                               [(self.sheet_key, kmz_name, name, fp) for name, fp in fingerprints.items()])
+                db.commit()
+            finally:
+                db.close()
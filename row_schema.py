@@ -0,0 +1,129 @@
+from itertools import repeat
+
+# Susunan kolom tiap sheet ditulis sekali secara deklaratif, lalu di-compile
+# terhadap header/template sheet yang sedang dipakai. Hasil compile: satu baris
+# dasar berisi semua nilai yang sama untuk seluruh batch + daftar kolom yang
+# isinya per baris. Baris dibangun per kolom untuk seluruh batch sekaligus.
+#
+#   SCHEMA = RowSchema([
+#       (range(0, 4), PREV),            # salin dari prev_row, kolom yang sama
+#       (4, param("district")),         # nilai tetap untuk satu batch
+#       (6, data("name")),              # nilai per baris
+#       ("vendorname", param("vendor")),  # kolom dicari dari header (dilewati bila tidak ada)
+#   ])
+#   rows = SCHEMA.compile(template, district=..., vendor=...).rows({"name": [...]})
+#
+# Field diproses berurutan; kalau dua field menulis kolom yang sama, yang
+# terakhir menang (sama seperti urutan assignment di kode lama).
+
+
+class _Source:
+    def __init__(self, kind, key=None):
+        self.kind = kind
+        self.key = key
+
+
+# Salin dari baris data terakhir (template.prev_row) / baris template
+# (template.template_row) pada kolom yang sama
+PREV = _Source("prev")
+TEMPLATE = _Source("template")
+
+
+def param(key):
+    # Nilai tetap untuk satu batch, diberikan saat compile()
+    return _Source("param", key)
+
+
+def data(key):
+    # Nilai per baris, diambil dari columns[key] saat rows()
+    return _Source("data", key)
+
+
+class RowSchema:
+    # width: "headers" = lebar sheet (template.width), "template" = panjang
+    # template_row (kosong bila sheet belum punya baris template).
+    def __init__(self, fields, width="headers"):
+        self.fields = fields
+        self.width = width
+
+    def _indexes(self, target, header_map):
+        if isinstance(target, str):
+            idx = header_map.get(target.lower())
+            return [] if idx is None else [idx]
+        if isinstance(target, range):
+            return list(target)
+        return [target]
+
+    def compile(self, template, **params):
+        width = template.width if self.width == "headers" else len(template.template_row)
+        rows = {"prev": template.prev_row, "template": template.template_row}
+        base = [""] * width
+        per_row = {}
+
+        for target, source in self.fields:
+            for idx in self._indexes(target, template.header_map):
+                if idx >= width:
+                    raise IndexError(f"Kolom {idx + 1} di luar lebar sheet ({width} kolom)")
+                if source.kind == "data":
+                    per_row[idx] = source.key
+                    continue
+                per_row.pop(idx, None)
+                if source.kind == "param":
+                    base[idx] = params[source.key]
+                else:
+                    row = rows[source.kind]
+                    base[idx] = row[idx] if idx < len(row) else ""
+
+        return RowBuilder(base, per_row)
+
+    def data_columns(self, template):
+        # Index kolom yang isinya per baris (dari KMZ), urut. Kolom lain
+        # (PREV/TEMPLATE/param) sama untuk seluruh batch.
+        width = template.width if self.width == "headers" else len(template.template_row)
+        columns = set()
+        for target, source in self.fields:
+            for idx in self._indexes(target, template.header_map):
+                if idx >= width:
+                    continue
+                if source.kind == "data":
+                    columns.add(idx)
+                else:
+                    columns.discard(idx)
+        return sorted(columns)
+
+
+class RowBuilder:
+    def __init__(self, base, per_row):
+        self.base = base
+        self.per_row = per_row
+
+    def _columns(self, columns):
+        n = len(next(iter(columns.values()))) if columns else 0
+        cols = [repeat(value, n) for value in self.base]
+        for idx, key in self.per_row.items():
+            values = columns[key]
+            if len(values) != n:
+                raise ValueError(f"Kolom '{key}' berisi {len(values)} nilai, seharusnya {n}")
+            cols[idx] = values
+        return cols
+
+    def rows(self, columns):
+        # columns: {key: list nilai per baris}, semua sama panjang
+        return [list(row) for row in zip(*self._columns(columns))]
+
+
+def column_names(headers, width):
+    # Nama kolom unik dari header sheet: kosong -> col_N, ganda -> nama_2, ...
+    names, seen = [], {}
+    for k in range(width):
+        name = headers[k].strip() if k < len(headers) and headers[k].strip() else f"col_{k + 1}"
+        seen[name] = seen.get(name, 0) + 1
+        names.append(name if seen[name] == 1 else f"{name}_{seen[name]}")
+    return names
+
+
+def values(items, key, default=None):
+    # Satu kolom data dari PlacemarkView (vektor) atau list dict
+    if hasattr(items, "column"):
+        return items.column(key)
+    return [item.get(key, default) for item in items]
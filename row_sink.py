@@ -0,0 +1,126 @@
+import json
+import os
+import re
+import threading
+from datetime import datetime
+
+from row_schema import column_names
+
+# Pengganti sheet.append_rows untuk dry-run: baris yang seharusnya dikirim
+# ditulis ke file lokal, isinya sama persis dengan yang akan di-append.
+#
+#   sink = ColumnarSink("hasil/", "parquet")   # atau "csv"
+#   dispatch(jobs, sink=sink)                  # pipeline, satu file per sheet
+#   append_fat_to_sheet(sheet, ..., sink=sink) # fungsi append_* lama
+#   paths = sink.close()
+#
+# Baris yang akan di-update di tempat (revisi KMZ) ditulis ke file terpisah
+# <sheet>_updates, dengan kolom pertama "row" = nomor baris di sheet.
+#
+# Nama kolom = header sheet saat itu (kosong -> col_N, ganda -> nama_2), jadi
+# file bisa langsung dimuat ke warehouse atau dibandingkan antar run.
+# Parquet ditulis lewat pyarrow (sudah ikut terpasang bersama streamlit).
+
+FORMATS = ("parquet", "csv")
+
+_FILE_INVALID = re.compile(r"[^\w.-]+")
+
+
+def file_stem(name):
+    return _FILE_INVALID.sub("_", name.strip()).strip("_") or "sheet"
+
+
+def _is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _column(pd, values):
+    # Kolom angka (boleh ada sel kosong) tetap angka; selain itu teks.
+    # Parquet butuh satu tipe per kolom, sedangkan baris sheet campuran.
+    numbers = [v for v in values if _is_number(v)]
+    if not numbers or len(numbers) != sum(v is not None and v != "" for v in values):
+        return ["" if v is None else str(v) for v in values]
+    dtype = "Int64" if all(isinstance(v, int) for v in numbers) else "Float64"
+    return pd.array([v if _is_number(v) else None for v in values], dtype=dtype)
+
+
+def frame(headers, rows):
+    # DataFrame satu sheet, nama kolom dari header
+    import pandas as pd
+
+    width = max([len(headers)] + [len(row) for row in rows])
+    columns = [[] for _ in range(width)]
+    for row in rows:
+        for k in range(width):
+            columns[k].append(row[k] if k < len(row) else "")
+    return pd.DataFrame({name: _column(pd, col) for name, col in zip(column_names(headers, width), columns)})
+
+
+class ColumnarSink:
+    def __init__(self, directory, fmt="parquet"):
+        if fmt not in FORMATS:
+            raise ValueError(f"Format dry-run '{fmt}' tidak dikenal (pilih: {', '.join(FORMATS)})")
+        self.directory = directory
+        self.fmt = fmt
+        # nama file -> (header, baris); satu sheet bisa ditulis beberapa kali
+        self.sheets = {}
+        self._lock = threading.Lock()
+
+    def write(self, name, headers, rows):
+        with self._lock:
+            stem = file_stem(name)
+            if stem not in self.sheets:
+                self.sheets[stem] = (list(headers), [])
+            self.sheets[stem][1].extend(rows)
+        return len(rows)
+
+    def __call__(self, job, batches):
+        # Bentuk sink untuk pipeline.dispatch
+        if job.updates:
+            self.write(f"{job.label}_updates", ["row"] + list(job.headers),
+                       [[number] + list(row) for number, row in sorted(job.updates.items())])
+        return self.write(job.label, job.headers, [row for batch in batches for row in batch])
+
+    def close(self, directory=None):
+        # Tulis semua file ke `directory` (default: folder saat dibuat), kembalikan daftar path
+        directory = directory or self.directory
+        os.makedirs(directory, exist_ok=True)
+        paths = []
+        for stem, (headers, rows) in self.sheets.items():
+            path = os.path.join(directory, f"{stem}.{self.fmt}")
+            data = frame(headers, rows)
+            if self.fmt == "parquet":
+                data.to_parquet(path, index=False)
+            else:
+                data.to_csv(path, index=False)
+            paths.append(path)
+        return paths
+
+
+class JsonSink:
+    # Satu file JSON berisi baris semua sheet beserta tujuan pengirimannya
+    def __init__(self, path):
+        self.path = path
+        self.sheets = {}
+
+    def __call__(self, job, batches):
+        rows = [row for batch in batches for row in batch]
+        self.sheets[job.label] = {
+            "spreadsheet_id": job.spreadsheet_id,
+            "sheet_name": job.sheet_name,
+            "value_input_option": job.value_input_option,
+            "headers": job.headers,
+            "rows": rows,
+            # Baris yang akan di-update di tempat & placemark yang hilang dari revisi
+            "updates": {str(number): row for number, row in sorted(job.updates.items())},
+            # Index kolom yang ditulis ulang pada baris update (null = seluruh baris)
+            "update_columns": job.update_columns,
+            "removed": [{"kmz_name": kmz, "name": name, "row": row} for kmz, name, row in job.removed],
+        }
+        return len(rows)
+
+    def close(self):
+        with open(self.path, "w", encoding="utf-8") as f:
+            json.dump({"created": datetime.now().isoformat(timespec="seconds"), "sheets": self.sheets},
+                      f, ensure_ascii=False, default=str)
+        return [self.path]
@@ -0,0 +1,38 @@
+class SheetTemplate:
+    # Header + beberapa baris terakhir sheet, tanpa get_all_values().
+    # Baris terakhir dicari dari satu kolom yang selalu terisi (probe_col,
+    # 1-based), lalu header dan baris ekor diambil dalam satu batch_get.
+    def __init__(self, sheet, probe_col=1, tail=2):
+        self.sheet = sheet
+        self.last_row = len(sheet.col_values(probe_col))
+
+        first_tail = max(2, self.last_row - tail + 1)
+        ranges = ["1:1"]
+        if self.last_row >= 2:
+            ranges.append(f"{first_tail}:{self.last_row}")
+        result = sheet.batch_get(ranges)
+
+        self.headers = list(result[0][0]) if result and result[0] else []
+        tail_rows = list(result[1]) if len(result) > 1 else []
+        self.width = max([len(self.headers)] + [len(r) for r in tail_rows])
+        self.headers += [""] * (self.width - len(self.headers))
+        self.header_map = {name.strip().lower(): i for i, name in enumerate(self.headers)}
+
+        # {nomor baris: isi baris} untuk baris ekor, sudah dipadatkan ke lebar sheet
+        self.rows = {first_tail + k: list(r) + [""] * (self.width - len(r)) for k, r in enumerate(tail_rows)}
+
+    def row(self, row_number):
+        return self.rows.get(row_number, [""] * self.width)
+
+    @property
+    def prev_row(self):
+        # Baris data terakhir yang tidak kosong (pengganti loop mundur di get_all_values)
+        for row_number in sorted(self.rows, reverse=True):
+            if any(self.rows[row_number]):
+                return self.rows[row_number]
+        return [""] * self.width
+
+    @property
+    def template_row(self):
+        # Sama dengan existing_rows[-2] dari get_all_values()
+        return self.row(self.last_row - 1) if self.last_row > 2 else []
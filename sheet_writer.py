@@ -0,0 +1,182 @@
+import random
+import threading
+import time
+
+from instrumentation import checkpoint
+
+# Jumlah baris per request append_rows
+CHUNK_SIZE = 500
+
+# Backoff eksponensial untuk 429 / 5xx
+MAX_RETRIES = 6
+BASE_DELAY = 1.0
+MAX_DELAY = 64.0
+
+
+class TokenBucket:
+    # Limiter request global (dipakai bersama semua spreadsheet & thread).
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+# Kuota Sheets API: 60 request tulis & 60 baca per menit per user
+WRITE_LIMITER = TokenBucket(rate=1.0, capacity=10)
+READ_LIMITER = TokenBucket(rate=1.0, capacity=10)
+
+
+class WriteError(Exception):
+    def __init__(self, written, total, cause):
+        super().__init__(f"{written}/{total} baris terkirim sebelum gagal: {cause}")
+        self.written = written
+        self.total = total
+        self.cause = cause
+
+
+def col_letter(idx):
+    # Index kolom 0-based -> huruf kolom A1 (0 -> A, 26 -> AA)
+    letters = ""
+    idx += 1
+    while idx:
+        idx, rem = divmod(idx - 1, 26)
+        letters = chr(65 + rem) + letters
+    return letters
+
+
+def status_code(exc):
+    return getattr(getattr(exc, "response", None), "status_code", None)
+
+
+def is_server_error(exc):
+    code = status_code(exc)
+    return code is not None and 500 <= code < 600
+
+
+def is_retryable(exc, idempotent=True):
+    # 429 ditolak sebelum diproses, selalu aman dikirim ulang. 5xx bisa datang
+    # setelah server menerapkan request: hanya request idempoten (baca,
+    # batch_update ke range tetap) yang boleh diulang begitu saja.
+    return status_code(exc) == 429 or (idempotent and is_server_error(exc))
+
+
+def _sleep_backoff(attempt):
+    delay = min(MAX_DELAY, BASE_DELAY * 2 ** attempt)
+    time.sleep(delay * (0.5 + random.random() / 2))
+
+
+def call_with_backoff(fn, *args, limiter=WRITE_LIMITER, retries=MAX_RETRIES, idempotent=True, **kwargs):
+    for attempt in range(retries + 1):
+        limiter.acquire()
+        try:
+            return fn(*args, **kwargs)
+        except Exception as e:
+            if attempt == retries or not is_retryable(e, idempotent):
+                raise
+            _sleep_backoff(attempt)
+
+
+def _same_cell(cell, value):
+    # Isi sel (teks tampilan) vs nilai yang dikirim; angka dibandingkan sebagai angka
+    text = "" if value is None else str(value).strip()
+    cell = cell.strip()
+    if cell == text:
+        return True
+    try:
+        return float(cell.replace(",", ".")) == float(text)
+    except ValueError:
+        return False
+
+
+def _landed(sheet, chunk, probe_col):
+    # Setelah 5xx pada append: apakah chunk ternyata sudah masuk? Dicek dari
+    # ekor kolom probe (satu col_values). None = tidak bisa dipastikan.
+    if probe_col is None:
+        return None
+    expected = [row[probe_col - 1] if probe_col - 1 < len(row) else "" for row in chunk]
+    # col_values memotong sel kosong di ujung kolom
+    while expected and (expected[-1] is None or str(expected[-1]).strip() == ""):
+        expected.pop()
+    if not expected:
+        return None
+    column = call_with_backoff(sheet.col_values, probe_col, limiter=READ_LIMITER)
+    tail = column[-len(expected):]
+    return len(tail) == len(expected) and all(_same_cell(c, v) for c, v in zip(tail, expected))
+
+
+def _append_chunk(sheet, chunk, value_input_option, probe_col):
+    # append_rows tidak idempoten: 429 diulang oleh call_with_backoff, 5xx
+    # hanya dikirim ulang setelah dipastikan chunk belum masuk ke sheet.
+    for attempt in range(MAX_RETRIES + 1):
+        try:
+            call_with_backoff(sheet.append_rows, chunk, value_input_option=value_input_option, idempotent=False)
+            return
+        except Exception as e:
+            if attempt == MAX_RETRIES or not is_server_error(e):
+                raise
+            landed = _landed(sheet, chunk, probe_col)
+            if landed:
+                return
+            if landed is None:
+                raise
+            _sleep_backoff(attempt)
+
+
+def append_rows_chunked(sheet, rows, value_input_option="RAW", chunk_size=CHUNK_SIZE, probe_col=None):
+    # probe_col (1-based, kolom yang selalu terisi): dipakai untuk memeriksa
+    # apakah chunk sudah masuk sebelum dikirim ulang setelah 5xx. Tanpa
+    # probe_col, 5xx pada append tidak diulang.
+    written = 0
+    for start in range(0, len(rows), chunk_size):
+        chunk = rows[start:start + chunk_size]
+        try:
+            checkpoint("append_rows")
+            _append_chunk(sheet, chunk, value_input_option, probe_col)
+        except Exception as e:
+            raise WriteError(written, len(rows), e) from e
+        written += len(chunk)
+    return written
+
+
+def _runs(columns):
+    # Index kolom (urut) -> rentang kolom berurutan [(awal, akhir), ...]
+    runs = []
+    for idx in columns:
+        if runs and idx == runs[-1][1] + 1:
+            runs[-1][1] = idx
+        else:
+            runs.append([idx, idx])
+    return runs
+
+
+def update_rows(sheet, rows_by_number, value_input_option="RAW", columns=None):
+    # Timpa beberapa baris di tempat ({nomor baris: isi baris}) dengan satu batch_update.
+    # columns: index kolom yang ditulis (default seluruh baris); kolom lain di
+    # sheet (salinan template, tanggal kirim, editan manual) tidak disentuh.
+    if not rows_by_number:
+        return 0
+    data = []
+    for number, row in sorted(rows_by_number.items()):
+        indexes = range(len(row)) if columns is None else sorted(c for c in columns if c < len(row))
+        for start, end in _runs(indexes):
+            data.append({"range": f"{col_letter(start)}{number}:{col_letter(end)}{number}",
+                         "values": [row[start:end + 1]]})
+    try:
+        call_with_backoff(sheet.batch_update, data, value_input_option=value_input_option)
+    except Exception as e:
+        raise WriteError(0, len(rows_by_number), e) from e
+    return len(rows_by_number)
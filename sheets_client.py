@@ -0,0 +1,76 @@
+import os
+import threading
+
+import streamlit as st
+
+from instrumentation import InstrumentedWorksheet
+
+SCOPES = ['https://spreadsheets.google.com/feeds', 'https://www.googleapis.com/auth/drive']
+
+_worksheets = {}
+_lock = threading.Lock()
+
+
+# gspread & google-auth baru di-import saat client pertama dibuat (tahap kirim),
+# supaya start aplikasi tidak ikut menanggung import-nya.
+
+
+@st.cache_resource
+def get_client():
+    # TARADWG_FAKE_SHEETS=<file.sqlite|:memory:> memakai fake_sheets (tanpa jaringan)
+    # TARADWG_FAKE_LOCALE=id_ID: angka di sheet tampil dengan koma desimal
+    fake_path = os.environ.get("TARADWG_FAKE_SHEETS")
+    if fake_path:
+        from fake_sheets import FakeClient
+        return FakeClient(path=None if fake_path == ":memory:" else fake_path,
+                          latency=float(os.environ.get("TARADWG_FAKE_LATENCY", "0")),
+                          locale=os.environ.get("TARADWG_FAKE_LOCALE", "en_US"))
+
+    # Satu client per proses. gspread memakai AuthorizedSession dari
+    # google-auth, jadi sesi HTTP dipakai bersama dan token di-refresh otomatis.
+    # TARADWG_CREDENTIALS=<service_account.json> untuk mode CLI (tanpa st.secrets).
+    import gspread
+    from google.oauth2.service_account import Credentials
+
+    credentials_file = os.environ.get("TARADWG_CREDENTIALS")
+    if credentials_file:
+        credentials = Credentials.from_service_account_file(credentials_file, scopes=SCOPES)
+    else:
+        credentials = Credentials.from_service_account_info(dict(st.secrets["gcp_service_account"]), scopes=SCOPES)
+    return gspread.authorize(credentials)
+
+
+def get_worksheet(spreadsheet_id, sheet_name):
+    key = (spreadsheet_id, sheet_name)
+    with _lock:
+        worksheet = _worksheets.get(key)
+    if worksheet is None:
+        worksheet = InstrumentedWorksheet(get_client().open_by_key(spreadsheet_id).worksheet(sheet_name))
+        with _lock:
+            _worksheets[key] = worksheet
+    return worksheet
+
+
+def invalidate():
+    with _lock:
+        _worksheets.clear()
+    get_client.clear()
+
+
+def is_auth_error(exc):
+    import gspread
+
+    response = getattr(exc, "response", None)
+    return isinstance(exc, gspread.exceptions.APIError) and getattr(response, "status_code", None) in (401, 403)
+
+
+def run_on_sheet(spreadsheet_id, sheet_name, writer, *args, **kwargs):
+    # Jalankan writer(worksheet, ...). Kalau ditolak karena auth (kredensial
+    # dicabut/kadaluarsa), buang semua handle lalu coba sekali lagi.
+    try:
+        return writer(get_worksheet(spreadsheet_id, sheet_name), *args, **kwargs)
+    except Exception as e:
+        if not is_auth_error(e):
+            raise
+        invalidate()
+        return writer(get_worksheet(spreadsheet_id, sheet_name), *args, **kwargs)
@@ -0,0 +1,222 @@
+import os
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import Context
+
+from instrumentation import Cancelled, start_run, stage, log_run
+
+# Submit dari halaman Streamlit dijalankan di thread latar, bukan di dalam
+# script: halaman tidak membeku selama parse/kirim, dan refresh browser tidak
+# memutus run. Registry job ada per proses server, jadi hasilnya bisa diambil
+# lagi dari rerun / sesi mana pun lewat id-nya (?job=<id>) sampai kadaluarsa.
+#
+#   job = start_submit(clusters, subfeeders, district, subdistrict, vendor)
+#   job = get_job(job_id)    # rerun berikutnya
+#   job.progress, job.active, job.sheets, job.messages, job.cancel()
+#
+# Thread pekerja tidak memanggil st.*: pesan disimpan sebagai (nama fungsi st,
+# isi) dan ditampilkan oleh halaman, sama seperti SheetJob.messages.
+
+# Jumlah submit yang diproses bersamaan (semua pengguna); sisanya antre
+MAX_JOBS = int(os.environ.get("TARADWG_MAX_JOBS", "2"))
+
+# Job yang sudah selesai disimpan selama ini (detik), lalu dibuang
+KEEP_SECONDS = 6 * 60 * 60
+
+QUEUED, RUNNING, DONE, FAILED, CANCELLED = "antre", "berjalan", "selesai", "gagal", "dibatalkan"
+
+_pool = ThreadPoolExecutor(max_workers=MAX_JOBS, thread_name_prefix="taradwg-submit")
+_jobs = {}
+_lock = threading.Lock()
+
+
+def is_cancelled(error):
+    return isinstance(error, Cancelled) or isinstance(getattr(error, "cause", None), Cancelled)
+
+
+class SubmitJob:
+    def __init__(self, names):
+        self.id = uuid.uuid4().hex[:12]
+        self.names = names
+        self.created = time.time()
+        self.finished = None
+        self.status = QUEUED
+        self.run = None
+        # Langkah: parse, build_jobs, lalu prepare & write tiap sheet (5 sheet sampai jumlahnya diketahui)
+        self.steps_done = 0
+        self.steps_total = 2 + 2 * 5
+        # Tahap yang sedang berjalan & status tiap sheet, untuk progres di UI
+        self.active = []
+        self.sheets = {}
+        self.messages = []
+        # (nama file, isi) hasil dry-run
+        self.downloads = []
+        self.cancelled = threading.Event()
+        self._lock = threading.Lock()
+
+    @property
+    def done(self):
+        return self.status in (DONE, FAILED, CANCELLED)
+
+    @property
+    def progress(self):
+        return min(1.0, self.steps_done / self.steps_total)
+
+    def cancel(self):
+        # Berlaku di awal tahap berikutnya / sebelum chunk append berikutnya;
+        # baris yang sudah terkirim tidak ditarik kembali
+        self.cancelled.set()
+
+    def say(self, kind, message):
+        with self._lock:
+            self.messages.append((kind, message))
+
+    def step(self):
+        with self._lock:
+            self.steps_done += 1
+
+    def plan(self, sheet_jobs):
+        with self._lock:
+            self.steps_total = 2 + 2 * len(sheet_jobs)
+            self.sheets = {job.label: "menyusun baris" for job in sheet_jobs}
+
+    def on_stage(self, current, event):
+        # Listener Run: daftar tahap yang sedang berjalan
+        with self._lock:
+            if event == "start":
+                self.active.append(current.name)
+            elif current.name in self.active:
+                self.active.remove(current.name)
+
+    def on_sheet(self, label, step, error):
+        # progress hook dispatch(); prepare yang gagal berarti write juga tidak jalan
+        with self._lock:
+            if error is None:
+                self.steps_done += 1
+                self.sheets[label] = "siap dikirim" if step == "prepare" else "terkirim"
+            else:
+                self.steps_done += 2 if step == "prepare" else 1
+                self.sheets[label] = CANCELLED if is_cancelled(error) else FAILED
+
+
+def _submit(job, clusters, subfeeders, district, subdistrict, vendor, dry_run_format):
+    # Parser, pipeline (shapely/pyproj) & client Sheets di-import di thread
+    # pekerja saat submit pertama, bukan saat halaman dibuka
+    from parse_cache import read_groups
+    from pipeline import build_jobs, dispatch, removed_message
+    from row_sink import ColumnarSink
+
+    # === BACA SEMUA KMZ CLUSTER & SUBFEEDER (PARALEL) ===
+    uploads = clusters + subfeeders
+    with stage("parse", rows=len(uploads), nbytes=sum(len(data) for data, _ in uploads)):
+        (clusters, subfeeders), errors = read_groups([clusters, subfeeders])
+    job.step()
+    for name, error in errors:
+        job.say("error", f"❌ {name}: {error}")
+
+    # === SUSUN BARIS SEMUA SHEET, LALU KIRIM PARALEL ===
+    with stage("build_jobs"):
+        jobs, notes = build_jobs(clusters, subfeeders, district, subdistrict, vendor)
+    job.step()
+    jobs = [sheet_job for sheet_job in jobs if sheet_job]
+    job.plan(jobs)
+    for kind, message in notes:
+        job.say(kind, message)
+
+    sink = ColumnarSink(None, dry_run_format) if dry_run_format else None
+    try:
+        with stage("sheet_io"):
+            results = dispatch(jobs, sink=sink, progress=job.on_sheet)
+    except Cancelled:
+        raise
+    except Exception as e:
+        job.say("error", f"❌ Gagal terhubung ke Google Sheets: {e}")
+        return FAILED
+
+    # === RINGKASAN HASIL ===
+    failed = cancelled = False
+    for sheet_job in jobs:
+        if sheet_job.label not in results:
+            continue
+        count, error = results[sheet_job.label]
+        if sheet_job.skipped:
+            job.say("info", f"⏭️ {sheet_job.skipped} baris {sheet_job.label} sudah ada di spreadsheet, dilewati")
+        if sheet_job.removed:
+            job.say("warning", removed_message(sheet_job))
+        if error is not None and is_cancelled(error):
+            cancelled = True
+            job.say("warning", f"⏹️ {sheet_job.label} dibatalkan, {count} baris sudah terkirim")
+            continue
+        if error is not None:
+            failed = True
+            job.say("error", f"❌ Gagal mengirim ke spreadsheet {sheet_job.label}: {error}")
+            continue
+        if sheet_job.updates and sink is not None:
+            job.say("info", f"🔁 {len(sheet_job.updates)} baris {sheet_job.label} berubah dari revisi sebelumnya, "
+                            "akan diperbarui (lihat file _updates)")
+        elif sheet_job.updates:
+            job.say("info", f"🔁 {len(sheet_job.updates)} baris {sheet_job.label} berubah dari revisi sebelumnya, "
+                            "diperbarui")
+        for kind, message in sheet_job.messages:
+            job.say(kind, message)
+
+    if sink is not None:
+        with tempfile.TemporaryDirectory() as tmpdir:
+            for path in sink.close(tmpdir):
+                with open(path, "rb") as f:
+                    job.downloads.append((os.path.basename(path), f.read()))
+        job.say("success", "✅ Dry-run selesai, tidak ada data yang dikirim ke Spreadsheet")
+    elif not (failed or cancelled):
+        job.say("success", "✅ Semua data berhasil diproses dan dikirim ke Spreadsheet!")
+    for label in ("FDT", "Kabel distribusi", "Kabel SubFeeder"):
+        count, error = results.get(label, (0, None))
+        if count and error is None:
+            job.say("info", f"✅ {count} {label}")
+    return CANCELLED if cancelled else FAILED if failed else DONE
+
+
+def _execute(job, *args):
+    run = start_run("submit", job.cancelled)
+    run.listeners.append(job.on_stage)
+    job.run = run
+    job.status = RUNNING
+    status = FAILED
+    try:
+        status = _submit(job, *args)
+    except Cancelled:
+        job.say("warning", "⏹️ Submit dibatalkan sebelum selesai, sheet yang belum dikirim dilewati")
+        status = CANCELLED
+    except Exception as e:
+        job.say("error", f"❌ Submit gagal: {e}")
+    finally:
+        job.active = []
+        log_run(run.finish())
+        job.finished = time.time()
+        # Status diisi terakhir: begitu job terlihat selesai, hasil & rincian waktunya sudah lengkap
+        job.status = status
+
+
+def _prune():
+    limit = time.time() - KEEP_SECONDS
+    for job_id in [job.id for job in _jobs.values() if job.finished and job.finished < limit]:
+        del _jobs[job_id]
+
+
+def start_submit(clusters, subfeeders, district, subdistrict, vendor, dry_run_format=None):
+    # clusters / subfeeders: daftar (isi KMZ bytes, kmz_name), dibaca dari upload
+    # sebelum script selesai. dry_run_format: None = kirim ke spreadsheet.
+    job = SubmitJob([name for _, name in clusters + subfeeders])
+    with _lock:
+        _prune()
+        _jobs[job.id] = job
+    # Context kosong: Run & tahap job ini tidak tercampur dengan job lain di thread yang sama
+    _pool.submit(Context().run, _execute, job, clusters, subfeeders, district, subdistrict, vendor, dry_run_format)
+    return job
+
+
+def get_job(job_id):
+    with _lock:
+        return _jobs.get(job_id)
@@ -0,0 +1,101 @@
+import argparse
+import random
+import zipfile
+from xml.sax.saxutils import escape
+
+# Folder template EMR dan porsi placemark per folder
+EMR_MIX = [
+    ("NEW POLE 7-3", 0.35),
+    ("NEW POLE 7-4", 0.08),
+    ("NEW POLE 9-4", 0.04),
+    ("EXISTING POLE EMR 7-3", 0.03),
+    ("EXISTING POLE EMR 7-4", 0.03),
+    ("EXISTING POLE EMR 9-4", 0.03),
+    ("FAT", 0.15),
+    ("FDT", 0.01),
+    ("DISTRIBUTION CABLE", 0.20),
+    ("CABLE", 0.08),
+]
+CABLE_FOLDERS = ("DISTRIBUTION CABLE", "CABLE")
+
+# Sekitar Pekanbaru
+ORIGIN_LON, ORIGIN_LAT = 101.40, 0.50
+
+
+def _point(name, desc, lon, lat):
+    return (f"<Placemark><name>{escape(name)}</name><description>{escape(desc)}</description>"
+            f"<Point><coordinates>{lon:.7f},{lat:.7f},0</coordinates></Point></Placemark>")
+
+
+def _line(name, desc, coords):
+    text = " ".join(f"{lon:.7f},{lat:.7f},0" for lon, lat in coords)
+    return (f"<Placemark><name>{escape(name)}</name><description>{escape(desc)}</description>"
+            f"<LineString><coordinates>{text}</coordinates></LineString></Placemark>")
+
+
+def _placemarks(folder, count, rnd, span):
+    for i in range(count):
+        lon = ORIGIN_LON + rnd.random() * span
+        lat = ORIGIN_LAT + rnd.random() * span
+        if folder in CABLE_FOLDERS:
+            coords = [(lon, lat)]
+            for _ in range(rnd.randint(1, 7)):
+                lon += (rnd.random() - 0.5) * 0.002
+                lat += (rnd.random() - 0.5) * 0.002
+                coords.append((lon, lat))
+            cores = rnd.choice([12, 24, 48, 96])
+            name = f"{folder[:3]}-{i:07d} (FO {cores}C/{cores // 12}T) AE {rnd.randint(50, 900)} M"
+            desc = f"Total Route : {rnd.randint(50, 2000)}M" if rnd.random() < 0.8 else ""
+            yield _line(name, desc, coords)
+        elif folder == "FDT":
+            yield _point(f"FDT-{i:05d}", rnd.choice(["FDT 48", "FDT 72", "FDT 96"]), lon, lat)
+        else:
+            yield _point(f"{folder.replace(' ', '')[:8]}-{i:07d}", "-", lon, lat)
+
+
+def write_kmz(target, n_placemarks, depth=1, seed=0, span=0.05, chunk=2000):
+    # Tulis KMZ template EMR ke `target` (path atau file object). XML ditulis
+    # bertahap langsung ke member zip, jadi 1 juta placemark tidak perlu
+    # ditampung di memori. `depth` = jumlah folder pembungkus di atas folder
+    # kategori (RFS / AREA / ...). Mengembalikan jumlah placemark per folder.
+    rnd = random.Random(seed)
+    counts = {folder: max(1, round(n_placemarks * share)) for folder, share in EMR_MIX}
+
+    with zipfile.ZipFile(target, "w", zipfile.ZIP_DEFLATED) as z:
+        with z.open("doc.kml", "w") as out:
+            def emit(text):
+                out.write(text.encode("utf-8"))
+
+            emit('<?xml version="1.0" encoding="UTF-8"?>\n'
+                 '<kml xmlns="http://www.opengis.net/kml/2.2"><Document><name>SYNTHETIC EMR</name>')
+            for d in range(depth):
+                emit(f"<Folder><name>LEVEL {d}</name>")
+            for folder, count in counts.items():
+                emit(f"<Folder><name>{folder}</name>")
+                buf = []
+                for placemark in _placemarks(folder, count, rnd, span):
+                    buf.append(placemark)
+                    if len(buf) >= chunk:
+                        emit("".join(buf))
+                        buf = []
+                emit("".join(buf))
+                emit("</Folder>")
+            emit("</Folder>" * depth)
+            emit("</Document></kml>")
+    return counts
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Buat KMZ sintetis sesuai template EMR")
+    parser.add_argument("output")
+    parser.add_argument("--placemarks", type=int, default=10000)
+    parser.add_argument("--depth", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    counts = write_kmz(args.output, args.placemarks, args.depth, args.seed)
+    print(f"{args.output}: {sum(counts.values())} placemark")
+
+
+if __name__ == "__main__":
+    main()
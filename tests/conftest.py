@@ -0,0 +1,86 @@
+import io
+import os
+import sys
+import tempfile
+
+import pytest
+
+# Semua tes memakai fake_sheets di memori dan index dedup di folder sementara;
+# harus diisi sebelum modul aplikasi di-import (path dibaca saat import)
+os.environ["TARADWG_FAKE_SHEETS"] = ":memory:"
+os.environ["TARADWG_DEDUP_DB"] = os.path.join(tempfile.mkdtemp(prefix="taradwg-test-"), "dedup.sqlite")
+os.environ.pop("TARADWG_FAKE_LATENCY", None)
+os.environ.pop("TARADWG_FAKE_LOCALE", None)
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import dedup_index  # noqa: E402
+import pipeline  # noqa: E402
+import sheet_writer  # noqa: E402
+import sheets_client  # noqa: E402
+from synthetic_kmz import write_kmz  # noqa: E402
+
+
+SHEET_WIDTH = 50
+
+
+def _header(named):
+    headers = [f"COL {i}" for i in range(SHEET_WIDTH)]
+    for idx, name in named.items():
+        headers[idx] = name
+    return headers
+
+
+# Header tiap sheet tujuan (hanya kolom yang dicari writer lewat nama header)
+HEADERS = {
+    (pipeline.SPREADSHEET_ID, pipeline.SHEET_NAME): _header({
+        6: "name", 8: "latitude", 9: "longitude", 10: "constructionstage", 11: "accessibility",
+        12: "activationstage", 13: "hierarchytype", 14: "pole height", 15: "vendorname",
+        16: "installationyear", 17: "productionyear", 18: "installationdate", 19: "remarks", 20: "poletype"}),
+    (pipeline.SPREADSHEET_ID_2, pipeline.SHEET_NAME_2): _header({
+        7: "fat name", 26: "installation_date", 32: "parentid 1", 33: "parent_type 1", 34: "fat type",
+        37: "vendor name"}),
+    (pipeline.SPREADSHEET_ID_3, pipeline.SHEET_NAME_3): _header({8: "fdt name", 46: "parentid 1"}),
+    (pipeline.SPREADSHEET_ID_4, pipeline.SHEET_NAME_4): _header({0: "cable name"}),
+    (pipeline.SPREADSHEET_ID_5, pipeline.SHEET_NAME_5): _header({0: "cable name"}),
+}
+
+
+def seed_sheets(client):
+    # Header + 2 baris template (T0..T49) per sheet; sheet FDT butuh "FDT xx" di kolom A
+    for (spreadsheet_id, title), headers in HEADERS.items():
+        template = [f"T{i}" for i in range(SHEET_WIDTH)]
+        if title == pipeline.SHEET_NAME_3:
+            template[0] = "FDT 48"
+        client.seed(spreadsheet_id, title, [headers, list(template), list(template)])
+
+
+@pytest.fixture
+def locale():
+    # Locale spreadsheet fake; parametrize("locale", [...]) untuk menggantinya
+    return "en_US"
+
+
+@pytest.fixture
+def client(monkeypatch, locale):
+    # FakeClient baru yang sudah berisi header + baris template tiap sheet,
+    # index dedup/revisi kosong, tanpa jeda limiter & backoff
+    monkeypatch.setenv("TARADWG_FAKE_LOCALE", locale)
+    if os.path.exists(dedup_index.CACHE_PATH):
+        os.remove(dedup_index.CACHE_PATH)
+    for limiter in (sheet_writer.WRITE_LIMITER, sheet_writer.READ_LIMITER):
+        monkeypatch.setattr(limiter, "rate", 1e6)
+    monkeypatch.setattr(sheet_writer, "BASE_DELAY", 0.0)
+    sheets_client.invalidate()
+    fake = sheets_client.get_client()
+    seed_sheets(fake)
+    yield fake
+    sheets_client.invalidate()
+
+
+@pytest.fixture
+def kmz():
+    # KMZ sintetis template EMR (isi bytes); nama placemark deterministik
+    buf = io.BytesIO()
+    write_kmz(buf, 400, depth=2, seed=7)
+    return buf.getvalue()
@@ -0,0 +1,53 @@
+from cable_join import join_cables
+
+# ~1 m dalam derajat (di sekitar khatulistiwa)
+METER = 1 / 111195
+LAT, LON = 0.5, 101.0
+
+
+def at(east, north=0.0):
+    # (lon, lat) sejauh `east` / `north` meter dari titik asal
+    return LON + east * METER, LAT + north * METER
+
+
+def node(name, east, north=0.0):
+    lon, lat = at(east, north)
+    return {"name": name, "lat": lat, "lon": lon}
+
+
+def cable(name, *points):
+    return {"name": name, "coordinates": [at(*p) for p in points]}
+
+
+FDT = [node("FDT-1", 0)]
+FAT = [node("FAT-1", 200)]
+POLES = [node("P-1", 100), node("P-2", 300), node("P-3", 200, 2)]
+
+
+def test_higher_hierarchy_end_is_parent_regardless_of_direction():
+    # Digambar dari FAT ke FDT: FDT tetap parent
+    links = join_cables([cable("C-1", (200,), (100,), (0,))], FDT, FAT, POLES)
+    assert (links.parent[0], links.parent_type[0]) == ("FDT-1", "FDT")
+    assert (links.child[0], links.child_type[0]) == ("FAT-1", "FAT")
+    assert links.unconnected == []
+
+
+def test_equal_hierarchy_keeps_drawing_direction():
+    links = join_cables([cable("C-1", (100,), (300,)), cable("C-2", (300,), (100,))], FDT, FAT, POLES)
+    assert (links.parent, links.child) == (["P-1", "P-2"], ["P-2", "P-1"])
+    assert links.parent_type == links.child_type == ["POLE", "POLE"]
+
+
+def test_higher_hierarchy_node_wins_within_tolerance():
+    # Ujung kabel 0.1 m dari tiang P-3 dan 1.9 m dari FAT: keduanya dalam toleransi,
+    # FAT menang karena hierarkinya lebih tinggi
+    links = join_cables([cable("C-1", (100,), (200, 1.9))], FDT, FAT, POLES)
+    assert (links.parent[0], links.child[0]) == ("FAT-1", "P-1")
+
+
+def test_loose_ends_are_reported():
+    links = join_cables([cable("C-1", (0,), (50,), (100,)), cable("C-2", (400,), (500,))], FDT, FAT, POLES)
+    assert links.parent == ["FDT-1", ""]
+    assert links.child == ["P-1", ""]
+    # C-1: kedua ujung tersambung, 2 segmen dengan vertex tengah tanpa node; C-2: lepas semua
+    assert links.unconnected == [("C-1", 0, 2), ("C-2", 2, 1)]
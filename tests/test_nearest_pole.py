@@ -0,0 +1,40 @@
+import math
+
+import pytest
+
+from nearest_pole import FAT_PARENT_TYPES, PoleIndex
+
+# ~1 m dalam derajat lintang
+METER = 1 / 111195
+
+
+def pole(name, lat, lon, folder="7m3inch"):
+    return {"name": name, "lat": lat, "lon": lon, "folder": folder}
+
+
+def test_nearest_pole_and_distance_in_meters():
+    poles = [pole("P-1", 0.5, 101.0), pole("P-2", 0.5 + 100 * METER, 101.0), pole("P-3", 0.5, 101.01)]
+    points = [{"name": "FAT-1", "lat": 0.5 + 70 * METER, "lon": 101.0},
+              {"name": "FAT-2", "lat": 0.5 + 10 * METER, "lon": 101.0}]
+    names, distances = PoleIndex(poles).nearest(points)
+    assert names == ["P-2", "P-1"]
+    assert distances[0] == pytest.approx(30, rel=0.01)
+    assert distances[1] == pytest.approx(10, rel=0.01)
+
+
+def test_pole_types_filter_parent_candidates():
+    poles = [pole("P-74", 0.5, 101.0, "7m4inch"), pole("P-73", 0.5 + 50 * METER, 101.0, "7m3inch")]
+    names, _ = PoleIndex(poles, FAT_PARENT_TYPES).nearest([{"name": "FAT", "lat": 0.5, "lon": 101.0}])
+    assert names == ["P-73"]
+
+
+def test_points_without_coordinates_or_poles_get_no_parent():
+    index = PoleIndex([pole("P-1", 0.5, 101.0), pole("P-X", None, None)])
+    names, distances = index.nearest([{"name": "A", "lat": None, "lon": None},
+                                      {"name": "B", "lat": 0.5, "lon": 101.0}])
+    assert names == ["", "P-1"]
+    assert math.isnan(distances[0])
+
+    names, distances = PoleIndex([]).nearest([{"name": "A", "lat": 0.5, "lon": 101.0}])
+    assert names == [""]
+    assert math.isnan(distances[0])
@@ -0,0 +1,92 @@
+import io
+import os
+import time
+import zipfile
+
+from parse_cache import ParseCache, content_hash
+from placemark_store import PlacemarkStore
+from synthetic_kmz import write_kmz
+
+
+def small_store(name):
+    store = PlacemarkStore()
+    store.add(name, 101.0, 0.5, "-", "FAT", "RFS/FAT")
+    return store.finish()
+
+
+def test_memory_cache_evicts_least_recently_used():
+    cache = ParseCache(max_entries=2, cache_dir=None)
+    cache.put("a", small_store("A"))
+    cache.put("b", small_store("B"))
+    assert cache.get("a") is not None   # "a" jadi yang terakhir dipakai
+    cache.put("c", small_store("C"))
+
+    assert cache.get("b") is None
+    assert cache.get("a").view().names == ["A"]
+    assert cache.get("c").view().names == ["C"]
+    assert cache.hits == 3
+
+
+def _age(cache, key, seconds):
+    path = cache._path(key)
+    past = time.time() - seconds
+    os.utime(path, (past, past))
+
+
+def test_disk_cache_trims_least_recently_used_files(tmp_path):
+    cache = ParseCache(max_entries=1, cache_dir=str(tmp_path))
+    cache.put("a", small_store("A"))
+    size = os.path.getsize(cache._path("a"))
+    # Cukup untuk dua file
+    cache.max_disk_bytes = 2 * size + size // 2
+    cache.put("b", small_store("B"))
+    _age(cache, "a", 200)
+    _age(cache, "b", 100)
+
+    # "a" sudah keluar dari memori (max_entries=1): dibaca dari disk, mtime diperbarui
+    assert cache.get("a").view().names == ["A"]
+    assert cache.disk_hits == 1
+    cache.put("c", small_store("C"))
+
+    assert os.path.exists(cache._path("a"))
+    assert not os.path.exists(cache._path("b"))
+    assert os.path.exists(cache._path("c"))
+    assert cache.get("b") is None
+
+
+def test_corrupt_disk_entry_is_dropped(tmp_path):
+    cache = ParseCache(max_entries=1, cache_dir=str(tmp_path))
+    with open(cache._path("a"), "wb") as f:
+        f.write(b"bukan pickle")
+    assert cache.get("a") is None
+    assert not os.path.exists(cache._path("a"))
+
+
+def kmz_bytes(seed, members=1):
+    out = io.BytesIO()
+    with zipfile.ZipFile(out, "w") as z:
+        for k in range(members):
+            doc = io.BytesIO()
+            write_kmz(doc, 200, depth=1, seed=seed + k)
+            with zipfile.ZipFile(doc) as src:
+                z.writestr("doc.kml" if k == 0 else f"parts/{k}.kml", src.read("doc.kml"))
+    return out.getvalue()
+
+
+def test_read_many_parses_each_content_once():
+    cache = ParseCache(max_entries=8, cache_dir=None)
+    first, second = kmz_bytes(1), kmz_bytes(2)
+    results = cache.read_many([first, b"bukan zip", second, first], workers=1)
+
+    assert [error is None for _, error in results] == [True, False, True, True]
+    assert results[0][0] is results[3][0]
+    assert cache.misses == 3
+    assert cache.get(content_hash(second)) is results[2][0]
+
+
+def test_read_many_in_process_pool_matches_sequential():
+    data = kmz_bytes(3, members=3)
+    sequential = ParseCache(cache_dir=None).read_many([data], workers=1)[0][0]
+    parallel = ParseCache(cache_dir=None).read_many([data], workers=2)[0][0]
+    assert parallel.view().names == sequential.view().names
+    assert parallel.coord_offset.tolist() == sequential.coord_offset.tolist()
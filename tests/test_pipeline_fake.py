@@ -0,0 +1,216 @@
+import io
+import re
+import zipfile
+from datetime import datetime
+
+import pytest
+
+import append_cable_pekanbaru
+import append_poles_to_main_sheet
+import append_subfeeder_cable
+import pipeline
+from cable_length import route_lengths
+from kmz_reader import combined_view, points_view, read_kmz
+from sheet_template import SheetTemplate
+
+
+def submit(kmz, kmz_name="RFS A"):
+    store = read_kmz(io.BytesIO(kmz))
+    jobs, _ = pipeline.build_jobs([(store, kmz_name)], [], "district", "subdistrict", "vendor")
+    jobs = [job for job in jobs if job]
+    results = pipeline.dispatch(jobs)
+    return {job.label: job for job in jobs}, results
+
+
+def worksheet(client, job):
+    return client.open_by_key(job.spreadsheet_id).worksheet(job.sheet_name)
+
+
+def calls(client, job, method):
+    return worksheet(client, job).stats().get(method, {}).get("calls", 0)
+
+
+def move_placemark(kmz, name, lon, lat):
+    # KMZ revisi: koordinat satu placemark titik diganti
+    with zipfile.ZipFile(io.BytesIO(kmz)) as z:
+        kml = z.read("doc.kml").decode("utf-8")
+    pattern = re.compile(rf"(<name>{re.escape(name)}</name>.*?<coordinates>)[^<]*(</coordinates>)")
+    kml, n = pattern.subn(rf"\g<1>{lon:.7f},{lat:.7f},0\g<2>", kml, count=1)
+    assert n == 1
+    out = io.BytesIO()
+    with zipfile.ZipFile(out, "w") as z:
+        z.writestr("doc.kml", kml)
+    return out.getvalue()
+
+
+@pytest.mark.parametrize("locale", ["en_US", "id_ID"])
+def test_resubmit_skips_every_row(client, kmz, locale):
+    jobs, results = submit(kmz)
+    assert all(error is None for _, error in results.values())
+    sizes = {label: len(worksheet(client, job).get_all_values()) for label, job in jobs.items()}
+    appended = {label: calls(client, job, "append_rows") for label, job in jobs.items()}
+
+    jobs, results = submit(kmz)
+    for label, job in jobs.items():
+        assert results[label] == (0, None)
+        assert job.skipped == sizes[label] - 3
+        assert not job.updates
+        assert len(worksheet(client, job).get_all_values()) == sizes[label]
+        assert calls(client, job, "append_rows") == appended[label]
+
+
+def test_revised_kmz_updates_row_in_place(client, kmz):
+    jobs, _ = submit(kmz)
+    fat = jobs["FAT"]
+    rows = worksheet(client, fat).get_all_values()
+    number = next(k for k, row in enumerate(rows, 1) if row[7] == "FAT-0000001")
+    # Editan manual di kolom non-data (salinan template, tanggal) harus tetap
+    worksheet(client, fat).batch_update([{"range": f"A{number}", "values": [["MANUAL"]]},
+                                         {"range": f"AA{number}", "values": [["01/01/2020"]]}])
+    rows = worksheet(client, fat).get_all_values()
+
+    jobs, results = submit(move_placemark(kmz, "FAT-0000001", 101.4321, 0.5123))
+    fat = jobs["FAT"]
+    assert results["FAT"] == (0, None)
+    assert list(fat.updates) == [number]
+    assert calls(client, fat, "batch_update") == 2
+    updated = worksheet(client, fat).get_all_values()
+    assert len(updated) == len(rows)
+    changed = [k for k, (old, new) in enumerate(zip(rows[number - 1], updated[number - 1])) if old != new]
+    assert changed and set(changed) <= set(fat.update_columns)
+    assert updated[number - 1][0] == "MANUAL"
+    assert updated[number - 1][26] == "01/01/2020"
+    assert updated[number - 1][7] == "FAT-0000001"
+
+
+def test_rows_deleted_from_sheet_are_sent_again(client, kmz):
+    jobs, results = submit(kmz)
+    count, _ = results["FAT"]
+    sheet = worksheet(client, jobs["FAT"])
+    # Operator menghapus semua baris FAT kiriman tadi langsung di sheet
+    sheet.delete_rows(4, 3 + count)
+    assert len(sheet.get_all_values()) == 3
+
+    jobs, results = submit(kmz)
+    assert results["FAT"] == (count, None)
+    assert jobs["FAT"].skipped == 0
+    assert len(sheet.get_all_values()) == 3 + count
+
+
+def test_cable_names_only_need_to_be_unique_per_rfs(client, kmz):
+    jobs, results = submit(kmz, "RFS-ALPHA")
+    count, _ = results["Kabel distribusi"]
+    assert count > 0
+
+    # KMZ lain dengan nama kabel yang sama: kabel tetap dikirim, titik
+    # (koordinat sama) tetap dilewati
+    jobs, results = submit(kmz, "RFS-BETA")
+    assert results["Kabel distribusi"] == (count, None)
+    assert jobs["Kabel distribusi"].skipped == 0
+    assert results["Pole"] == (0, None)
+    rows = worksheet(client, jobs["Kabel distribusi"]).get_all_values()
+    assert [row[36] for row in rows[3:]] == ["RFS-ALPHA"] * count + ["RFS-BETA"] * count
+
+
+def test_rate_limited_append_is_retried(client, kmz):
+    store = read_kmz(io.BytesIO(kmz))
+    jobs, _ = pipeline.build_jobs([(store, "RFS A")], [], "district", "subdistrict", "vendor")
+    pole = jobs[0]
+    sheet = worksheet(client, pole)
+    before = len(sheet.get_all_values())
+    sheet.fail_next(429, method="append_rows")
+
+    results = pipeline.dispatch([job for job in jobs if job])
+    count, error = results["Pole"]
+    assert error is None
+    assert len(sheet.get_all_values()) == before + count
+    assert sheet.stats()["append_rows"]["errors"] == 1
+
+
+def test_server_error_after_append_does_not_duplicate(client, kmz):
+    store = read_kmz(io.BytesIO(kmz))
+    jobs, _ = pipeline.build_jobs([(store, "RFS A")], [], "district", "subdistrict", "vendor")
+    pole = jobs[0]
+    sheet = worksheet(client, pole)
+    before = len(sheet.get_all_values())
+    # Append sudah masuk, tapi respons 503: tidak boleh dikirim ulang
+    sheet.fail_next(503, method="append_rows", applied=True)
+
+    results = pipeline.dispatch([job for job in jobs if job])
+    count, error = results["Pole"]
+    assert error is None
+    assert len(sheet.get_all_values()) == before + count
+    assert sheet.stats()["append_rows"]["calls"] == 1
+
+
+# Susunan baris dari builder sebelum RowSchema, sebagai pembanding
+
+def old_pole_row(template, pole, district, subdistrict, vendor):
+    header_map, prev_row = template.header_map, template.prev_row
+    today = datetime.today()
+    date = today.strftime("%d/%m/%Y") if prev_row[header_map.get('installationdate', 0)].count("/") == 2 \
+        else today.strftime("%Y-%m-%d")
+    row = [""] * len(template.headers)
+    row[0:4] = prev_row[0:4]
+    row[4:10] = [district.upper(), subdistrict.upper(), pole['name'], pole['name'], pole['lat'], pole['lon']]
+    for col in ['constructionstage', 'accessibility', 'activationstage', 'hierarchytype']:
+        if col in header_map:
+            row[header_map[col]] = prev_row[header_map[col]]
+    filled = {'pole height': pole['height'], 'vendorname': vendor.upper(), 'installationyear': str(today.year),
+              'productionyear': str(today.year), 'installationdate': date,
+              'remarks': "SUBFEEDER" if pole['folder'] in ['7m4inch', '9m4inch'] else "CLUSTER",
+              'poletype': pole['folder']}
+    for col, value in filled.items():
+        if col in header_map:
+            row[header_map[col]] = value
+    return row
+
+
+def old_cable_row(template, cable, length, vendor, kmz_name, subfeeder):
+    template_row = template.template_row
+    name = cable.get("name", "")
+    row = [""] * len(template_row)
+    row[0] = row[1] = name
+    row[2:6] = template_row[2:6]
+    for idx in (10, 11, 20, 21, 35):
+        row[idx] = template_row[idx]
+    row[24] = datetime.today().strftime("%d/%m/%Y")
+    row[36] = kmz_name
+    row[38] = vendor
+    if subfeeder:
+        row[22] = vendor
+    match_fo = re.search(r"\(FO\s*(\d+)C/(\d+)T\)", name.upper())
+    if match_fo:
+        row[9], row[12] = match_fo.group(2), match_fo.group(1)
+    match = re.search(r"AE\s*[-]?\s*(\d+)\s*M", name.upper())
+    if match:
+        row[16] = match.group(1)
+    row[15] = length
+    return row
+
+
+def template_for(client, spreadsheet_id, sheet_name, probe_col):
+    return SheetTemplate(client.open_by_key(spreadsheet_id).worksheet(sheet_name), probe_col=probe_col)
+
+
+def test_pole_schema_matches_old_builder(client, kmz):
+    _, poles, _ = points_view(read_kmz(io.BytesIO(kmz)))
+    template = template_for(client, pipeline.SPREADSHEET_ID, pipeline.SHEET_NAME,
+                            append_poles_to_main_sheet.PROBE_COL)
+    rows = append_poles_to_main_sheet.build_pole_rows(template, poles, "district", "subdistrict", "vendor")
+    assert rows == [old_pole_row(template, pole, "district", "subdistrict", "vendor") for pole in poles]
+
+
+@pytest.mark.parametrize("module, build, folder, subfeeder", [
+    (append_cable_pekanbaru, "build_cable_pekanbaru_rows", "DISTRIBUTION CABLE", False),
+    (append_subfeeder_cable, "build_subfeeder_cable_rows", "CABLE", True),
+])
+def test_cable_schema_matches_old_builder(client, kmz, module, build, folder, subfeeder):
+    folders, _ = combined_view(read_kmz(io.BytesIO(kmz)))
+    cables = folders[folder]
+    lengths, _ = route_lengths(cables)
+    template = template_for(client, pipeline.SPREADSHEET_ID_4, pipeline.SHEET_NAME_4, module.PROBE_COL)
+    rows = getattr(module, build)(template, cables, lengths, "district", "subdistrict", "vendor", "RFS A")
+    assert len(rows) == len(cables) > 0
+    assert rows == [old_cable_row(template, cable, length, "vendor", "RFS A", subfeeder)
+                    for cable, length in zip(cables, lengths)]
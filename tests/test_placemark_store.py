@@ -0,0 +1,96 @@
+import io
+import pickle
+import zipfile
+
+import numpy as np
+
+from kmz_reader import kml_parts, merge_stores, read_kml, read_kmz
+from placemark_store import PlacemarkStore
+
+
+def store_of(rows):
+    store = PlacemarkStore()
+    for name, description, folder, path, coords in rows:
+        lon, lat = coords[0] if coords else (None, None)
+        store.add(name, lon, lat, description, folder, path, coords=coords)
+    return store
+
+
+def columns(store):
+    view = store.view()
+    return {key: view.column(key) for key in ("name", "description", "folder", "path", "lat", "lon")}
+
+
+def test_extend_remaps_string_codes():
+    first = store_of([
+        ("A", "-", "FAT", "RFS/FAT", [(101.0, 0.5)]),
+        ("B", "x", "FDT", "RFS/FDT", [(101.1, 0.6)]),
+    ])
+    # Urutan string berbeda: kode "B"/"-"/"FAT" di store kedua tidak sama dengan store pertama
+    second = store_of([
+        ("C", "x", "FDT", "RFS/FDT", [(101.2, 0.7), (101.3, 0.8)]),
+        (None, "-", "FAT", "RFS/FAT", []),
+        ("B", "y", "CABLE", "RFS/CABLE", [(101.4, 0.9)]),
+    ])
+    merged = PlacemarkStore().extend(first).extend(second).finish()
+
+    got = columns(merged)
+    assert got["name"] == ["A", "B", "C", "", "B"]
+    assert got["description"] == ["-", "x", "x", "-", "y"]
+    assert got["folder"] == ["FAT", "FDT", "FDT", "FAT", "CABLE"]
+    assert got["path"] == ["RFS/FAT", "RFS/FDT", "RFS/FDT", "RFS/FAT", "RFS/CABLE"]
+    assert got["lat"][3] is None
+    assert len(merged.names) == 3
+    assert {path: idx.tolist() for path, idx in merged.folder_index.items()} == {
+        "RFS/FAT": [0, 3], "RFS/FDT": [1, 2], "RFS/CABLE": [4]}
+    # Offset vertex digeser sesuai jumlah vertex store pertama
+    assert merged.view()[2]["coordinates"] == [(101.2, 0.7), (101.3, 0.8)]
+    assert merged.view()[3]["coordinates"] == []
+    assert merged.view()[4]["coordinates"] == [(101.4, 0.9)]
+
+
+def test_pickled_store_keeps_columns():
+    store = store_of([("A", "-", "FAT", "RFS/FAT", [(101.0, 0.5)])]).finish()
+    copy = pickle.loads(pickle.dumps(store))
+    assert columns(copy) == columns(store)
+    assert copy.folder_index["RFS/FAT"].tolist() == [0]
+
+
+def _kml(*folders):
+    body = ""
+    for folder, placemarks in folders:
+        body += f"<Folder><name>{folder}</name>"
+        for name, lon, lat in placemarks:
+            body += (f"<Placemark><name>{name}</name><description>-</description>"
+                     f"<Point><coordinates>{lon},{lat},0</coordinates></Point></Placemark>")
+        body += "</Folder>"
+    return f'<kml xmlns="http://www.opengis.net/kml/2.2"><Document>{body}</Document></kml>'
+
+
+def multi_member_kmz():
+    out = io.BytesIO()
+    with zipfile.ZipFile(out, "w") as z:
+        z.writestr("images/overlay.png", b"\x89PNG")
+        z.writestr("parts/b.kml", _kml(("FAT", [("FAT-2", 101.2, 0.52)]),
+                                       ("NEW POLE 7-3", [("P-2", 101.3, 0.53)])))
+        z.writestr("doc.kml", _kml(("FAT", [("FAT-1", 101.1, 0.51)]),
+                                   ("NEW POLE 9-4", [("P-1", 101.0, 0.50)])))
+    return out.getvalue()
+
+
+def test_every_kml_member_is_read_doc_kml_first():
+    store = read_kmz(multi_member_kmz())
+    assert store.view().names == ["FAT-1", "P-1", "FAT-2", "P-2"]
+    fat = [path for path in store.folder_index if path.endswith("FAT")]
+    assert len(fat) == 1
+    assert store.folder_index[fat[0]].tolist() == [0, 2]
+
+
+def test_merged_parts_equal_sequential_read():
+    data = multi_member_kmz()
+    sequential = read_kmz(data)
+    merged = merge_stores([read_kml(*part) for part in kml_parts(data)])
+    assert columns(merged) == columns(sequential)
+    assert np.array_equal(merged.pole_type, sequential.pole_type)
+    assert {k: v.tolist() for k, v in merged.folder_index.items()} == \
+        {k: v.tolist() for k, v in sequential.folder_index.items()}